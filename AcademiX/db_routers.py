@@ -0,0 +1,140 @@
+"""
+Read-replica routing.
+
+Views decorated with ``replica_reads`` send their ORM reads to the ``replica``
+database alias for GET/HEAD requests. Every write goes to ``default``; once a
+request writes, its remaining reads use ``default`` too, and
+``replica_pinning_middleware`` sets a short-lived cookie so the same browser
+keeps reading from ``default`` for REPLICA_PIN_SECONDS (read-your-writes while
+the replica catches up). Sharded models (see AcademiX.sharding) are left to
+ShardRouter.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .sharding import is_sharded
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_COOKIE = 'replica_pin'
+
+# Sessions are read before the view runs and must see fresh logins
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+class ReplicaState:
+    """Per-request routing state, shared with threads run via sync_to_async"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.use_replica = False
+        self.wrote = False
+
+
+_state = ContextVar('replica_state', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None
+            or not state.use_replica
+            or state.pinned
+            or state.wrote
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or is_sharded(model)
+            or REPLICA_DB_ALIAS not in settings.DATABASES
+        ):
+            return None
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.wrote = True
+        if is_sharded(model):
+            return None  # ShardRouter picks the shard
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives schema changes from the primary
+        return db != REPLICA_DB_ALIAS
+
+
+@contextmanager
+def _replica_scope(request):
+    if request.method not in ('GET', 'HEAD'):
+        yield
+        return
+
+    state = _state.get()
+    token = None
+    if state is None:
+        state = ReplicaState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+    previous = state.use_replica
+    state.use_replica = True
+    try:
+        yield
+    finally:
+        state.use_replica = previous
+        if token is not None:
+            _state.reset(token)
+
+
+def replica_reads(view_func):
+    """Allow a read-only view's queries to be served by the replica"""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            with _replica_scope(request):
+                return await view_func(request, *args, **kwargs)
+    else:
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            with _replica_scope(request):
+                return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def _pin_if_wrote(response, state):
+    if state.wrote:
+        response.set_cookie(
+            PIN_COOKIE, '1',
+            max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10),
+            httponly=True,
+            samesite='Lax',
+        )
+    return response
+
+
+@sync_and_async_middleware
+def replica_pinning_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state = ReplicaState(pinned=PIN_COOKIE in request.COOKIES)
+            token = _state.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                _state.reset(token)
+            return _pin_if_wrote(response, state)
+    else:
+        def middleware(request):
+            state = ReplicaState(pinned=PIN_COOKIE in request.COOKIES)
+            token = _state.set(state)
+            try:
+                response = get_response(request)
+            finally:
+                _state.reset(token)
+            return _pin_if_wrote(response, state)
+    return middleware
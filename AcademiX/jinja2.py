@@ -0,0 +1,56 @@
+"""
+Optional Jinja2 rendering for the hottest templates.
+
+The Jinja2 engine is listed before DjangoTemplates in TEMPLATES and only
+answers for the template names in its "templates" option (settings
+JINJA2_TEMPLATES); every other name falls through to the Django engine.
+Ports of those templates live in jinja2/ and get the same helpers the
+Django versions use: static, url, the asset bundle tags and Django's
+date/floatformat/truncatechars filters. The messages and auth context
+processors run as usual, and Django's backend adds csrf_input/csrf_token.
+Compare both engines with `manage.py benchmark_templates`.
+"""
+from django.template import TemplateDoesNotExist
+from django.template.backends.jinja2 import Jinja2 as BaseJinja2
+from django.template.defaultfilters import date, floatformat, truncatechars
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment
+
+from users.templatetags.assets import css_bundle, js_bundle, preload_bundles
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'preload_bundles': preload_bundles,
+        'css_bundle': css_bundle,
+        'js_bundle': js_bundle,
+    })
+    env.filters.update({
+        'date': date,
+        'floatformat': floatformat,
+        'truncatechars': truncatechars,
+    })
+    return env
+
+
+class Jinja2(BaseJinja2):
+    """Jinja2 backend that only serves the template names listed in OPTIONS['templates']"""
+
+    def __init__(self, params):
+        params = params.copy()
+        options = params['OPTIONS'] = params.get('OPTIONS', {}).copy()
+        self.enabled_templates = set(options.pop('templates', ()))
+        super().__init__(params)
+
+    def get_template(self, template_name):
+        if template_name not in self.enabled_templates:
+            raise TemplateDoesNotExist(template_name, backend=self)
+        return super().get_template(template_name)
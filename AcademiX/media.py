@@ -0,0 +1,173 @@
+"""
+Serving user-uploaded media (course images, avatars) in production.
+
+MEDIA_SERVE_MODE picks how MEDIA_URL requests are answered:
+
+- "app": served in-process as a FileResponse (zero-copy sendfile under
+  gunicorn) with single Range requests, strong ETags, Last-Modified and
+  conditional GETs.
+- "x-accel": nginx serves the file from an internal location
+  (MEDIA_ACCEL_PREFIX); Django only routes the request and never touches
+  the disk.
+- "x-sendfile": the same for Apache/lighttpd (mod_xsendfile), by path.
+- "off": no media URLs; the front proxy serves MEDIA_ROOT itself.
+
+Uploads are stored under content-hashed names by HashedMediaStorage, and
+those URLs are cached for a year; other names are revalidated with the
+ETag after MEDIA_CACHE_SECONDS.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+HASH_LENGTH = 12
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{%d}\.[^./]+$' % HASH_LENGTH)
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """Saves uploads as name.<content hash>.ext; re-uploading the same file reuses it"""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        hasher = hashlib.sha256()
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        content.seek(0)
+
+        root, ext = os.path.splitext(name)
+        name = f"{root}.{hasher.hexdigest()[:HASH_LENGTH]}{ext}"
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+class _FileRange:
+    """File-like view of the next length bytes of an open file; keeps fileno() for sendfile"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _cache_control(path):
+    if HASHED_NAME_RE.search(path):
+        return f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_SECONDS', 86400)}"
+
+
+def _parse_range(header, size):
+    """(start, end) of a single 'bytes=' range, None to ignore it, or False if unsatisfiable"""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None  # Malformed or multiple ranges: serve the whole file
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def serve_media(request, path):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'app')
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Media file not found')
+
+    if mode == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+        response['Cache-Control'] = _cache_control(path)
+        return response
+
+    try:
+        file_stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Media file not found')
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404('Media file not found')
+
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        response['Cache-Control'] = _cache_control(path)
+        return response
+
+    etag = '"%x-%x"' % (file_stat.st_mtime_ns, file_stat.st_size)
+    last_modified = int(file_stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, full_path, file_stat.st_size, content_type, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = _cache_control(path)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _file_response(request, full_path, size, content_type, etag, last_modified):
+    byte_range = None
+    if 'Range' in request.headers:
+        # A stale If-Range (changed file) means the client needs the whole file
+        if_range = request.headers.get('If-Range')
+        if if_range is None or if_range in (etag, http_date(last_modified)):
+            byte_range = _parse_range(request.headers['Range'], size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{size}"
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(_FileRange(file, end - start + 1), status=206, content_type=content_type)
+    response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    response['Content-Length'] = end - start + 1
+    return response
+
+
+def media_urlpatterns():
+    """URL patterns serving MEDIA_URL according to MEDIA_SERVE_MODE"""
+    if getattr(settings, 'MEDIA_SERVE_MODE', 'app') == 'off' or not settings.MEDIA_URL.startswith('/'):
+        return []
+    prefix = re.escape(settings.MEDIA_URL.lstrip('/'))
+    return [re_path(rf'^{prefix}(?P<path>.+)$', serve_media, name='media')]
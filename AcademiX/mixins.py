@@ -0,0 +1,78 @@
+from django.db import models
+
+
+class DirtyFieldsMixin(models.Model):
+    """Track changes since load so save() only writes the columns that changed.
+
+    Values are snapshotted when an instance is loaded from (or written to) the
+    database. save() on a loaded instance then becomes a no-op if nothing
+    changed, or save(update_fields=[...]) with the changed columns plus any
+    auto_now fields. Explicit update_fields/force_insert saves are untouched.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            attname: value
+            for attname, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
+    def _snapshot(self, fields=None):
+        loaded = getattr(self, '_loaded_values', {})
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                value = getattr(self, field.attname)
+                # Store file fields by name so later comparisons use the stored path
+                loaded[field.attname] = value.name if isinstance(value, models.fields.files.FieldFile) else value
+        self._loaded_values = loaded
+
+    def get_dirty_fields(self):
+        """Names of concrete fields changed since the last load/save (all fields if never saved)"""
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            return [field.name for field in self._meta.concrete_fields if not field.primary_key]
+
+        dirty = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in loaded:
+                continue
+            value = getattr(self, field.attname)
+            if isinstance(value, models.fields.files.FieldFile) and not value._committed:
+                dirty.append(field.name)  # Newly assigned upload
+            elif value != loaded[field.attname]:
+                dirty.append(field.name)
+        return dirty
+
+    def save(self, *args, **kwargs):
+        tracked = (
+            not self._state.adding
+            and hasattr(self, '_loaded_values')
+            and not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        )
+        if tracked:
+            dirty = self.get_dirty_fields()
+            if not dirty:
+                return  # Nothing changed: skip the write entirely
+            auto_now = [
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False) and field.name not in dirty
+            ]
+            kwargs['update_fields'] = dirty + auto_now
+
+        super().save(*args, **kwargs)
+        self._snapshot(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot(fields)
@@ -0,0 +1,144 @@
+"""
+Pre-rendered landing pages for anonymous visitors.
+
+`manage.py prerender` renders the URL names in settings.PRERENDER_PAGES as
+an anonymous visitor would see them and writes each one to
+PRERENDER_DIR/<path>/index.html (plus a gzipped copy). The middleware, which
+sits right after WhiteNoise, serves those files through WhiteNoise to GET
+and HEAD requests that carry no session or message cookie, so landing-page
+traffic never reaches the URLconf, the session store or the database;
+everyone else gets the live view.
+
+Pages are re-rendered after every committed Field or Course change (the
+admin is the only writer), on the node that made the change. With several
+nodes, put PRERENDER_DIR on shared storage or rely on the warm-up, which
+renders them on every start. Pages that set cookies or contain a CSRF token
+depend on the visitor and are refused.
+"""
+import gzip
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage import default_storage
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils.cache import patch_vary_headers
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from videos.models import Course, Field
+
+INDEX_FILE = 'index.html'
+
+# When the last rendering started (time.monotonic()), so the regenerations
+# queued by a bulk admin change run once
+_last_rendered = 0.0
+
+
+class PrerenderError(Exception):
+    pass
+
+
+def prerender_dir():
+    return Path(settings.PRERENDER_DIR)
+
+
+def _write(path, content):
+    """Replace path with content atomically, so WhiteNoise never serves a partial file"""
+    fd, partial = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    os.chmod(partial, 0o644)
+    os.replace(partial, path)
+
+
+def render_page(name):
+    """The HTML an anonymous visitor gets from the URL name, checked to be the same for everyone"""
+    path = reverse(name)
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    request.session = SessionBase()
+    request._messages = default_storage(request)
+
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        raise PrerenderError(f"{path} answered {response.status_code}")
+    if response.cookies or b'csrfmiddlewaretoken' in response.content:
+        raise PrerenderError(f"{path} depends on the visitor (cookies or a CSRF token) and can't be shared")
+    return path, response.content
+
+
+def prerender_pages(names=None):
+    """Render the pages (default: settings.PRERENDER_PAGES) and delete stale ones; returns the paths written"""
+    global _last_rendered
+    _last_rendered = time.monotonic()
+
+    root = prerender_dir()
+    written = []
+    for name in names or settings.PRERENDER_PAGES:
+        url, content = render_page(name)
+        directory = root / url.strip('/')
+        directory.mkdir(parents=True, exist_ok=True)
+        # The compressed copy first: WhiteNoise takes the ETag from the plain one
+        _write(directory / f"{INDEX_FILE}.gz", gzip.compress(content, compresslevel=9, mtime=0))
+        _write(directory / INDEX_FILE, content)
+        written.append(directory / INDEX_FILE)
+
+    if names is None:
+        for path in root.rglob(INDEX_FILE):
+            if path not in written:
+                path.unlink()
+                path.with_name(f"{INDEX_FILE}.gz").unlink(missing_ok=True)
+    return written
+
+
+@receiver([post_save, post_delete], sender=Field)
+@receiver([post_save, post_delete], sender=Course)
+def catalog_changed(sender, raw=False, **kwargs):
+    if raw or not settings.PRERENDER_ENABLED:
+        return
+    changed = time.monotonic()
+
+    def regenerate():
+        if _last_rendered < changed:
+            prerender_pages()
+
+    transaction.on_commit(regenerate, robust=True)
+
+
+def _anonymous(request):
+    # Checked by cookie alone: loading the session would cost a query
+    return settings.SESSION_COOKIE_NAME not in request.COOKIES and 'messages' not in request.COOKIES
+
+
+def prerender_middleware(get_response):
+    if not settings.PRERENDER_ENABLED:
+        raise MiddlewareNotUsed
+
+    # Re-checks the directory per request so regenerated files are picked up
+    pages = WhiteNoise(None, autorefresh=True, index_file=True, allow_all_origins=False,
+                       max_age=None if settings.DEBUG else 60)
+    pages.add_files(prerender_dir())
+
+    def middleware(request):
+        if request.method in ('GET', 'HEAD') and request.path_info.endswith('/') and _anonymous(request):
+            page = pages.find_file(request.path_info)
+            if page is not None:
+                response = WhiteNoiseMiddleware.serve(page, request)
+                # Signed-in visitors get the live page at the same URL
+                patch_vary_headers(response, ('Cookie',))
+                return response
+        return get_response(request)
+    return middleware
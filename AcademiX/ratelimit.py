@@ -0,0 +1,85 @@
+"""
+Per-user rate limiting for hot or expensive endpoints.
+
+Each (limit name, user) pair has a token bucket stored in the default
+cache, so every worker process shares it when the cache does (Redis in
+production). A request takes one token; an empty bucket answers 429 with a
+Retry-After header instead of running the view. Limits are configured in
+settings.RATE_LIMITS as name -> (requests per minute, burst).
+
+The bucket is read and written without a lock, so requests racing on the
+same key may each see the same tokens: a client can overshoot by at most
+its number of concurrent requests.
+"""
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+
+class RateLimit:
+    """A cache-backed token bucket per key"""
+
+    def __init__(self, name, per_minute, burst):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+
+    def _key(self, key):
+        return f"ratelimit:{self.name}:{key}"
+
+    def take(self, key):
+        """Take a token for key; returns 0 if allowed, else seconds until one is available"""
+        now = time.time()
+        tokens, updated = cache.get(self._key(key)) or (self.burst, now)
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            return (1 - tokens) / self.rate
+        # Kept until the bucket would be full again, when it is no different from a missing one
+        cache.set(self._key(key), (tokens - 1, now), math.ceil((self.burst - tokens + 1) / self.rate) + 1)
+        return 0
+
+
+def _client_key(request, user):
+    if user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _too_many_requests(retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    response = JsonResponse(
+        {'success': False, 'error': 'Too many requests, please slow down', 'retry_after': seconds}, status=429
+    )
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def rate_limit(name):
+    """Limit a view per user with the settings.RATE_LIMITS entry `name` (sync or async views)"""
+    def decorator(view_func):
+        def limit():
+            per_minute, burst = settings.RATE_LIMITS[name]
+            return RateLimit(name, per_minute, burst)
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def wrapper(request, *args, **kwargs):
+                user = await request.auser()
+                retry_after = await sync_to_async(limit().take)(_client_key(request, user))
+                if retry_after:
+                    return _too_many_requests(retry_after)
+                return await view_func(request, *args, **kwargs)
+        else:
+            @wraps(view_func)
+            def wrapper(request, *args, **kwargs):
+                retry_after = limit().take(_client_key(request, request.user))
+                if retry_after:
+                    return _too_many_requests(retry_after)
+                return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'AcademiX.prerender.prerender_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -73,8 +75,36 @@ TEMPLATES = [
     },
 ]
 
+# Optional Jinja2 engine (AcademiX.jinja2) for the hottest templates: it
+# renders the names listed in JINJA2_TEMPLATES from jinja2/ and everything
+# else falls through to DjangoTemplates. Set it to "" to render all with Django.
+# These render 1.6-3x faster with Jinja2 (manage.py benchmark_templates).
+JINJA2_TEMPLATES = [
+    name for name in os.getenv(
+        "JINJA2_TEMPLATES", "dashboard.html,topics.html,course-registration.html"
+    ).split(",") if name
+]
+if JINJA2_TEMPLATES:
+    TEMPLATES.insert(0, {
+        'BACKEND': 'AcademiX.jinja2.Jinja2',
+        'DIRS': [BASE_DIR / 'jinja2'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'AcademiX.jinja2.environment',
+            'templates': JINJA2_TEMPLATES,
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    })
+
 WSGI_APPLICATION = 'AcademiX.wsgi.application'
 
+# Async views (course registration/refresh) multiplex YouTube calls when served
+# by an ASGI server, e.g. gunicorn -k uvicorn.workers.UvicornWorker AcademiX.asgi
+ASGI_APPLICATION = 'AcademiX.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -87,6 +117,98 @@ DATABASES = {
     )
 }
 
+# Single-node SQLite tuning (see AcademiX.sqlite): WAL and pragmas on each
+# connection, write transactions that take the write lock up front, and a
+# per-process writer queue for the progress tracking writes. Off here, since
+# WAL mode sticks to the database file; settings_production turns tuning on
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "0") == "1"
+SQLITE_WRITE_QUEUE = os.getenv("SQLITE_WRITE_QUEUE", "0") == "1"
+if SQLITE_TUNING and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+
+# Optional read replica. Views marked with AcademiX.db_routers.replica_reads
+# read from it; after a write the user is pinned to the primary for
+# REPLICA_PIN_SECONDS. Locally, point DATABASE_REPLICA_URL at a second SQLite
+# file and keep it in sync with `manage.py sync_replica --interval 2`.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_PIN_SECONDS = 10
+DATABASE_ROUTERS = []
+
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS.append('AcademiX.db_routers.ReplicaRouter')
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.contrib.sessions.middleware.SessionMiddleware'),
+        'AcademiX.db_routers.replica_pinning_middleware',
+    )
+
+# Per-user tables sharded by hashing the user id (see AcademiX.sharding).
+# DATABASE_SHARD_URLS is a comma-separated list of database URLs; the word
+# "default" reuses the default database as one of the shards. Create the
+# sharded tables with `manage.py migrate --database=shard_N` and move rows
+# after changing the list with `manage.py reshard_progress`.
+SHARDED_MODELS = {
+    'videos.videoprogress': 'user_id',
+    'videos.watchevent': 'user_id',
+}
+SHARD_DATABASES = ['default']
+
+DATABASE_SHARD_URLS = [url.strip() for url in os.getenv("DATABASE_SHARD_URLS", "").split(",") if url.strip()]
+if DATABASE_SHARD_URLS:
+    SHARD_DATABASES = []
+    for index, url in enumerate(DATABASE_SHARD_URLS):
+        if url == 'default':
+            SHARD_DATABASES.append('default')
+            continue
+        alias = f'shard_{index}'
+        DATABASES[alias] = dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True)
+        SHARD_DATABASES.append(alias)
+    DATABASE_ROUTERS.insert(0, 'AcademiX.sharding.ShardRouter')
+
+
+# Cache
+# Local memory by default; set REDIS_URL to share the cache between workers
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Cached sessions and users
+# With CACHED_AUTH=1 sessions are read from the cache (written through to the
+# DB) and the User + UserProfile pair is cached until either is saved, which
+# removes the session, auth_user and profile queries from most requests.
+# Needs a cache shared by every worker (REDIS_URL): with a per-process cache,
+# logout, password changes and deactivation would only reach one worker.
+
+CACHED_AUTH = os.getenv("CACHED_AUTH", "0") == "1"
+AUTH_USER_CACHE_TIMEOUT = 300
+
+if CACHED_AUTH:
+    if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+        raise ImproperlyConfigured("CACHED_AUTH=1 needs a cache shared between workers: set REDIS_URL")
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = [
+        'users.backends.CachedModelBackend',
+        # Keeps sessions created before CACHED_AUTH was enabled valid
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -125,11 +247,45 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = ["static"]
+STATICFILES_FINDERS = [
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    'users.assets.BundleFinder',
+]
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# Whitenoise for static files
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# Whitenoise for static files: content-hashed names plus .gz/.br siblings
+STORAGES = {
+    "default": {
+        "BACKEND": "AcademiX.media.HashedMediaStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
+# Concatenated + minified bundles, served as static/bundles/<name>. Built
+# from the sources by users.assets.BundleFinder during collectstatic (or
+# `manage.py build_assets`) into ASSET_BUNDLE_ROOT, which is not checked in.
+# Source order matters for the CSS cascade.
+ASSET_BUNDLE_ROOT = BASE_DIR / 'cache' / 'bundles'
+ASSET_BUNDLES = {
+    'site.css': [
+        'css/styles.css',
+        'css/pages.css',
+        'css/courses.css',
+        'css/dashboard.css',
+        'css/buttons.css',
+        'css/responsive.css',
+    ],
+    'site.js': [
+        'js/messages.js',
+        'js/responsive.js',
+    ],
+}
+# Serve the individual source files while developing
+ASSET_BUNDLES_ENABLED = not DEBUG
 
 
 # Default primary key field type
@@ -140,4 +296,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'  
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# How MEDIA_URL is served (see AcademiX.media): "app", "x-accel" (nginx
+# internal location MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT), "x-sendfile"
+# or "off" when the proxy serves MEDIA_ROOT directly
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "app")
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_SECONDS = 86400
+
+# Cold unfinished VideoProgress rows moved out by `manage.py archive_progress`
+PROGRESS_ARCHIVE_DIR = Path(os.getenv("PROGRESS_ARCHIVE_DIR", BASE_DIR / 'archive' / 'progress'))
+PROGRESS_ARCHIVE_DAYS = int(os.getenv("PROGRESS_ARCHIVE_DAYS", "180"))
+
+# Per-course enrollment bitmaps (videos.enrollment_index), shared by all
+# worker processes on a node; rebuilt with `manage.py rebuild_enrollment_index`
+ENROLLMENT_INDEX_DIR = Path(os.getenv("ENROLLMENT_INDEX_DIR", BASE_DIR / 'cache' / 'enrollments'))
+
+# Online database snapshots taken by `manage.py snapshot` (AcademiX.snapshots)
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", BASE_DIR / 'backups'))
+
+# Landing pages served to anonymous visitors as pre-rendered HTML
+# (AcademiX.prerender), written by `manage.py prerender` and re-rendered when
+# a Field or Course changes. Off in development so template edits show up
+PRERENDER_ENABLED = os.getenv("PRERENDER", "0") == "1"
+PRERENDER_PAGES = ['home', 'about']
+PRERENDER_DIR = Path(os.getenv("PRERENDER_DIR", BASE_DIR / 'cache' / 'prerendered'))
+
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+# Overridden by `manage.py benchmark_serving` to point at a local stub
+YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
+YOUTUBE_MAX_CONNECTIONS = int(os.getenv("YOUTUBE_MAX_CONNECTIONS", "200"))
+YOUTUBE_TIMEOUT = float(os.getenv("YOUTUBE_TIMEOUT", "10"))
+
+# YouTube quota scheduler: background refreshes may not spend the last
+# YOUTUBE_QUOTA_RESERVE units of the day and are paced per process over the
+# rest of the day, in bursts of up to YOUTUBE_QUOTA_BURST units
+YOUTUBE_DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+YOUTUBE_QUOTA_RESERVE = int(os.getenv("YOUTUBE_QUOTA_RESERVE", "2000"))
+YOUTUBE_QUOTA_BURST = int(os.getenv("YOUTUBE_QUOTA_BURST", "2000"))
+
+# Per-user token buckets (AcademiX.ratelimit): name -> (requests per minute, burst)
+RATE_LIMITS = {
+    'track_progress': (120, 30),
+    'refresh_videos': (2, 3),
+}
+
+# Concurrent refreshes of a course wait for the one in flight, for at most this long
+YOUTUBE_REFRESH_LOCK_SECONDS = 120
@@ -0,0 +1,43 @@
+"""
+Production settings: the development settings with debug off and
+everything that can be prepared once per process done up front.
+
+Used by gunicorn (see gunicorn.conf.py); for management commands set
+DJANGO_SETTINGS_MODULE=AcademiX.settings_production.
+"""
+
+import os
+
+# WAL and IMMEDIATE write transactions (AcademiX.sqlite), applied by the
+# SQLITE_TUNING block of the base settings. The writer queue stays opt-in:
+# `manage.py benchmark_serving --sqlite-mode` showed no gain
+os.environ.setdefault("SQLITE_TUNING", "1")
+
+from .settings import *  # noqa: E402,F401,F403
+from django.core.exceptions import ImproperlyConfigured  # noqa: E402
+
+DEBUG = False
+
+SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", SECRET_KEY)
+
+ALLOWED_HOSTS = [host.strip() for host in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",") if host.strip()]
+if not ALLOWED_HOSTS:
+    raise ImproperlyConfigured("Set DJANGO_ALLOWED_HOSTS to the comma-separated host names this site serves")
+
+# Compile each template once per process; `manage.py warmup` fills this
+# cache before the worker takes traffic (the Jinja2 engine, when enabled,
+# caches compiled templates itself and doesn't stat them with DEBUG off)
+DJANGO_TEMPLATES = next(engine for engine in TEMPLATES if engine['BACKEND'].endswith('DjangoTemplates'))
+DJANGO_TEMPLATES['APP_DIRS'] = False
+DJANGO_TEMPLATES['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+ASSET_BUNDLES_ENABLED = True
+
+PRERENDER_ENABLED = os.getenv("PRERENDER", "1") == "1"
+
+STATIC_ROOT = os.getenv("DJANGO_STATIC_ROOT", STATIC_ROOT)
@@ -0,0 +1,99 @@
+"""
+Horizontal sharding of per-user tables.
+
+Models listed in SHARDED_MODELS (label -> user id attribute) live on one of the
+SHARD_DATABASES aliases, chosen by hashing the user id. Queries on them must
+name their shard, normally through ``Model.objects.for_user(user)``; saves and
+related lookups are routed by ShardRouter from the instance. Queries spanning
+all users go through the cross-shard helpers below.
+
+With no shards configured SHARD_DATABASES is ['default'] and everything stays
+on the default database.
+"""
+import zlib
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+
+def shard_aliases():
+    return list(getattr(settings, 'SHARD_DATABASES', ['default']))
+
+
+def _shard_only_aliases():
+    return set(shard_aliases()) - {'default'}
+
+
+def shard_for_user(user_or_id):
+    """Database alias holding the per-user rows of this user"""
+    user_id = getattr(user_or_id, 'pk', user_or_id)
+    aliases = shard_aliases()
+    if len(aliases) == 1:
+        return aliases[0]
+    return aliases[zlib.crc32(str(user_id).encode()) % len(aliases)]
+
+
+def sharded_user_attr(model):
+    """Name of the user id attribute of a sharded model, or None if not sharded"""
+    return getattr(settings, 'SHARDED_MODELS', {}).get(model._meta.label_lower)
+
+
+def is_sharded(model):
+    return sharded_user_attr(model) is not None
+
+
+# Cross-shard helpers (admin, exports, reporting)
+
+def shard_querysets(queryset):
+    """The given queryset bound to each shard in turn"""
+    return [queryset.using(alias) for alias in shard_aliases()]
+
+
+def count_all_shards(queryset):
+    return sum(qs.count() for qs in shard_querysets(queryset))
+
+
+def iter_all_shards(queryset, chunk_size=2000):
+    """Stream the queryset's results from every shard, one shard after another"""
+    return chain.from_iterable(qs.iterator(chunk_size=chunk_size) for qs in shard_querysets(queryset))
+
+
+def delete_all_shards(queryset):
+    return sum(qs.delete()[0] for qs in shard_querysets(queryset))
+
+
+class ShardRouter:
+    def _db_for_instance(self, model, instance):
+        user_attr = sharded_user_attr(model)
+        if user_attr is not None:
+            if instance is None:
+                return None
+            if isinstance(instance, model):
+                return shard_for_user(getattr(instance, user_attr))
+            if isinstance(instance, get_user_model()):
+                return shard_for_user(instance.pk)
+            # Reverse lookups from shared rows (e.g. topic.videoprogress_set)
+            # cannot be routed; callers must pick shards explicitly
+            return None
+
+        # Shared models looked up from a sharded row (progress.topic) live on default
+        if instance is not None and instance._state.db in _shard_only_aliases():
+            return 'default'
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_instance(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_instance(model, hints.get('instance'))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if model_name is None:
+            return False if db in _shard_only_aliases() else None
+        if f"{app_label}.{model_name}" in getattr(settings, 'SHARDED_MODELS', {}):
+            return db in shard_aliases()
+        return False if db in _shard_only_aliases() else None
@@ -0,0 +1,227 @@
+"""
+Online database snapshots (`manage.py snapshot`) and restores (`manage.py restore_snapshot`).
+
+SQLite databases are copied with the online backup API: in WAL mode in one
+step, since its read transaction doesn't block writers; otherwise a few
+pages at a time, so writers are only held off for one step at a time (a
+write restarts the copy, so this needs quiet moments). The copy is then
+checked with PRAGMA integrity_check and gzipped. PostgreSQL databases are
+streamed through pg_dump, which exports one consistent MVCC snapshot
+without blocking writes. Each snapshot is a directory holding one file per
+database, a manifest.json and a SHA256SUMS file (`sha256sum -c` works).
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+# Pages copied per backup step outside WAL mode, and the pause between
+# steps that lets writers in
+SQLITE_STEP_PAGES = 1024
+SQLITE_STEP_SLEEP = 0.005
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_dir():
+    return Path(getattr(settings, 'SNAPSHOT_DIR', settings.BASE_DIR / 'backups'))
+
+
+def _vendor(database):
+    if 'sqlite' in database['ENGINE']:
+        return 'sqlite'
+    if 'postgresql' in database['ENGINE']:
+        return 'postgresql'
+    raise SnapshotError(f"Snapshots are not supported for {database['ENGINE']}")
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy(source, target):
+    """Copy one file object into another in chunks; returns (sha256, bytes) of the data"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+        target.write(chunk)
+    return digest.hexdigest(), size
+
+
+def _integrity_check(connection):
+    result = connection.execute('PRAGMA integrity_check').fetchone()[0]
+    if result != 'ok':
+        raise SnapshotError(f"Integrity check failed: {result}")
+
+
+def _pg_env(database):
+    env = dict(os.environ)
+    for key, name in (('HOST', 'PGHOST'), ('PORT', 'PGPORT'), ('USER', 'PGUSER'), ('PASSWORD', 'PGPASSWORD')):
+        if database.get(key):
+            env[name] = str(database[key])
+    return env
+
+
+def _snapshot_sqlite(database, directory, alias, pages, sleep):
+    partial = directory / f"{alias}.partial.sqlite3"
+    source = sqlite3.connect(str(database['NAME']))
+    target = sqlite3.connect(partial)
+    try:
+        if pages is None:
+            wal = source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            pages = -1 if wal else SQLITE_STEP_PAGES
+        source.backup(target, pages=pages, sleep=sleep)
+        _integrity_check(target)
+        # Keep the whole snapshot in the one file
+        target.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        target.close()
+        source.close()
+
+    filename = f"{alias}.sqlite3.gz"
+    with open(partial, 'rb') as raw, gzip.open(directory / filename, 'wb', compresslevel=6) as compressed:
+        raw_sha256, raw_bytes = _copy(raw, compressed)
+    partial.unlink()
+    return {'file': filename, 'raw_sha256': raw_sha256, 'raw_bytes': raw_bytes}
+
+
+def _snapshot_postgresql(database, directory, alias):
+    filename = f"{alias}.pgdump"
+    argv = ['pg_dump', '--format=custom', '--compress=6', '--no-owner', '--dbname', database['NAME']]
+    with open(directory / filename, 'wb') as target:
+        process = subprocess.Popen(argv, env=_pg_env(database), stdout=subprocess.PIPE)
+        _copy(process.stdout, target)
+        if process.wait():
+            raise SnapshotError(f"pg_dump exited with status {process.returncode}")
+    return {'file': filename}
+
+
+def take_snapshot(aliases=None, directory=None, pages=None, sleep=SQLITE_STEP_SLEEP):
+    """Snapshot the given database aliases (default: all but the replica); returns the snapshot directory"""
+    from AcademiX.db_routers import REPLICA_DB_ALIAS
+
+    aliases = aliases or [alias for alias in settings.DATABASES if alias != REPLICA_DB_ALIAS]
+    directory = Path(directory or snapshot_dir() / timezone.now().strftime('%Y%m%dT%H%M%SZ'))
+    directory.mkdir(parents=True, exist_ok=False)
+
+    manifest = {'created_at': timezone.now().isoformat(), 'databases': {}}
+    for alias in aliases:
+        database = settings.DATABASES[alias]
+        vendor = _vendor(database)
+        started = time.monotonic()
+        if vendor == 'sqlite':
+            entry = _snapshot_sqlite(database, directory, alias, pages, sleep)
+        else:
+            entry = _snapshot_postgresql(database, directory, alias)
+        entry.update(
+            vendor=vendor,
+            sha256=_sha256(directory / entry['file']),
+            bytes=(directory / entry['file']).stat().st_size,
+            seconds=round(time.monotonic() - started, 3),
+        )
+        manifest['databases'][alias] = entry
+
+    with open(directory / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    with open(directory / 'SHA256SUMS', 'w') as f:
+        for entry in manifest['databases'].values():
+            f.write(f"{entry['sha256']}  {entry['file']}\n")
+    return directory
+
+
+def read_manifest(directory):
+    """The snapshot's manifest, after checking every file against its checksum"""
+    directory = Path(directory)
+    try:
+        with open(directory / 'manifest.json') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise SnapshotError(f"No manifest.json in {directory}")
+
+    for alias, entry in manifest['databases'].items():
+        if _sha256(directory / entry['file']) != entry['sha256']:
+            raise SnapshotError(f"Checksum mismatch for {entry['file']} ({alias})")
+    return manifest
+
+
+def _restore_sqlite(database, directory, alias, entry):
+    target_path = Path(database['NAME'])
+    partial = target_path.with_name(f"{target_path.name}.restore-{datetime.now():%Y%m%d%H%M%S}")
+    try:
+        with gzip.open(directory / entry['file'], 'rb') as compressed, open(partial, 'wb') as raw:
+            raw_sha256, _ = _copy(compressed, raw)
+        if raw_sha256 != entry['raw_sha256']:
+            raise SnapshotError(f"Checksum mismatch for the uncompressed {entry['file']} ({alias})")
+
+        source = sqlite3.connect(partial)
+        target = sqlite3.connect(str(target_path), timeout=30)
+        try:
+            _integrity_check(source)
+            # Copying pages into the live file keeps its WAL and other connections consistent
+            connections[alias].close()
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+def _restore_postgresql(database, directory, alias, entry):
+    argv = ['pg_restore', '--clean', '--if-exists', '--no-owner', '--single-transaction',
+            '--dbname', database['NAME'], str(directory / entry['file'])]
+    connections[alias].close()
+    if subprocess.run(argv, env=_pg_env(database)).returncode:
+        raise SnapshotError(f"pg_restore failed for {alias}")
+
+
+def restore_snapshot(directory, aliases=None):
+    """Replace the contents of the given databases (default: all in the snapshot); returns the manifest"""
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    aliases = aliases or list(manifest['databases'])
+
+    for alias in aliases:
+        entry = manifest['databases'].get(alias)
+        if entry is None:
+            raise SnapshotError(f"The snapshot has no database {alias}")
+        database = settings.DATABASES[alias]
+        if _vendor(database) != entry['vendor']:
+            raise SnapshotError(f"{alias} is {_vendor(database)} but the snapshot is {entry['vendor']}")
+
+        started = time.monotonic()
+        if entry['vendor'] == 'sqlite':
+            _restore_sqlite(database, directory, alias, entry)
+        else:
+            _restore_postgresql(database, directory, alias, entry)
+        entry['restore_seconds'] = round(time.monotonic() - started, 3)
+    return manifest
+
+
+def prune_snapshots(keep):
+    """Delete all but the newest keep snapshot directories; returns the deleted paths"""
+    snapshots = sorted(path for path in snapshot_dir().glob('*') if (path / 'manifest.json').exists())
+    deleted = snapshots[:-keep] if keep else snapshots
+    for path in deleted:
+        shutil.rmtree(path)
+    return deleted
@@ -0,0 +1,120 @@
+"""
+High-concurrency SQLite for single-node deployments.
+
+With SQLITE_TUNING on, every new SQLite connection gets WAL journaling
+(readers never block the writer), a busy timeout instead of immediate
+"database is locked" errors, synchronous=NORMAL (durable in WAL mode up to
+the last checkpoint), and larger mmap/page caches.
+
+SQLite allows one writer at a time, so with SQLITE_WRITE_QUEUE on, hot
+write paths go through run_write(): one writer thread per process runs the
+queued write jobs, committing all jobs queued meanwhile in one transaction
+(group commit), while reads keep running in parallel on the request
+threads. On other databases run_write() just runs the job in a transaction.
+
+Both switches are off by default, since WAL mode sticks to the database
+file. settings_production turns SQLITE_TUNING on; SQLITE_WRITE_QUEUE stays
+opt-in everywhere (set SQLITE_WRITE_QUEUE=1).
+"""
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 10000,  # ms
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,  # KiB, i.e. 64 MB per connection
+    'temp_store': 'MEMORY',
+}
+
+# Most jobs committed together in one transaction
+MAX_GROUP_SIZE = 64
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_TUNING', False):
+        return
+    with connection.cursor() as cursor:
+        for name, value in PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+class WriteQueue:
+    """Runs write jobs one transaction at a time on a dedicated thread"""
+
+    def __init__(self, using='default'):
+        self.using = using
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, job, *args, **kwargs):
+        """Queue job(*args, **kwargs); returns a Future with its result"""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self.thread.start()
+        future = Future()
+        # The job runs in the caller's context, so per-request state such as
+        # the replica router's "this request wrote" flag sees its writes
+        self.jobs.put((future, contextvars.copy_context(), job, args, kwargs))
+        return future
+
+    def _run(self):
+        while True:
+            group = [self.jobs.get()]
+            while len(group) < MAX_GROUP_SIZE:
+                try:
+                    group.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(group)
+
+    def _commit(self, group):
+        results = []
+        try:
+            with transaction.atomic(using=self.using):
+                for future, context, job, args, kwargs in group:
+                    # A savepoint per job: one failing job doesn't undo the others
+                    try:
+                        with transaction.atomic(using=self.using):
+                            results.append((future, context.run(job, *args, **kwargs), None))
+                    except Exception as e:
+                        results.append((future, None, e))
+        except Exception as e:
+            results = [(future, None, e) for future, *_ in group]
+        finally:
+            connections[self.using].close_if_unusable_or_obsolete()
+
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+write_queue = WriteQueue()
+
+
+def run_write(job, *args, **kwargs):
+    """Run a write job (a function doing ORM writes) and return its result.
+
+    Goes through the SQLite writer thread when SQLITE_WRITE_QUEUE is on and
+    the caller isn't already inside a transaction; otherwise runs inline in
+    a transaction.
+    """
+    connection = connections['default']
+    if (getattr(settings, 'SQLITE_WRITE_QUEUE', False) and connection.vendor == 'sqlite'
+            and not connection.in_atomic_block):
+        return write_queue.submit(job, *args, **kwargs).result()
+    with transaction.atomic():
+        return job(*args, **kwargs)
@@ -16,14 +16,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
+from AcademiX.media import media_urlpatterns
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('users/', include('users.urls')),
-    path('videos/', include('videos.urls'))
-]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('videos/', include('videos.urls')),
+    path('api/v1/', include('videos.api_urls')),
+] + media_urlpatterns()
 
 
 
@@ -0,0 +1,101 @@
+"""
+Process warm-up: do the one-off work of a cold Django process (template
+compilation, URLconf imports, DB connections, catalog queries, pre-rendered
+landing pages) before it serves its first request. Run by `manage.py warmup` and by gunicorn in the
+master process before workers are forked (gunicorn.conf.py).
+"""
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+
+def _template_dirs(engine):
+    """Directories searched by the engine's loaders, including wrapped (cached) ones"""
+    dirs = []
+    for loader in engine.engine.template_loaders:
+        for inner in getattr(loader, 'loaders', [loader]):
+            dirs.extend(inner.get_dirs())
+    return dirs
+
+
+def compile_templates():
+    """Load every template of the template engines into their caches"""
+    compiled = 0
+    for engine in engines.all():
+        if hasattr(engine, 'env'):  # Jinja2 (imported lazily: jinja2 is optional)
+            for name in engine.env.list_templates(extensions=['html']):
+                engine.env.get_template(name)
+                compiled += 1
+            continue
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in _template_dirs(engine):
+            for path in Path(directory).rglob('*.html'):
+                try:
+                    engine.get_template(path.relative_to(directory).as_posix())
+                    compiled += 1
+                except Exception as e:
+                    print(f"Error compiling template {path}: {e}")
+    return compiled
+
+
+def resolve_urls():
+    """Import every view module and build the reverse lookup tables"""
+    resolver = get_resolver()
+    resolver.reverse_dict  # Populates the resolver tree
+    return len(resolver.url_patterns)
+
+
+def open_connections():
+    for alias in connections:
+        connections[alias].ensure_connection()
+    return len(connections.all())
+
+
+def prime_catalog():
+    """Run the catalog and content type queries every process needs early"""
+    from videos.queries import catalog_courses, catalog_fields
+
+    ContentType.objects.get_for_models(*apps.get_models())
+    return len(list(catalog_fields())) + len(list(catalog_courses()))
+
+
+def prerender():
+    """Render the anonymous landing pages, so every node starts with current ones"""
+    from AcademiX.prerender import prerender_pages
+
+    if not settings.PRERENDER_ENABLED:
+        return 0
+    return len(prerender_pages())
+
+
+STEPS = [
+    ('templates', compile_templates),
+    ('urls', resolve_urls),
+    ('connections', open_connections),
+    ('catalog', prime_catalog),
+    ('prerender', prerender),
+]
+
+
+def warm_up(connect=True):
+    """Run the warm-up steps; returns [(step, count, seconds)]
+
+    With connect=False, database connections are closed afterwards (e.g. in
+    a process that is about to fork).
+    """
+    timings = []
+    for name, step in STEPS:
+        started = time.perf_counter()
+        count = step()
+        timings.append((name, count, time.perf_counter() - started))
+    if not connect:
+        connections.close_all()
+    return timings
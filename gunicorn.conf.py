@@ -0,0 +1,45 @@
+"""
+gunicorn configuration (loaded automatically from the working directory).
+
+The app is imported and warmed up once in the master (preload_app), then
+the heap is frozen so forked workers share those pages copy-on-write
+instead of touching them on their first garbage collection.
+"""
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AcademiX.settings_production')
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# Worker model, from `manage.py benchmark_serving` (4 workers, 32 concurrent
+# users, default mix, YouTube stub at 300 ms, 1 CPU, SQLite):
+#
+#   sync      52 req/s  p50 492 ms  p95 1212 ms  p99 1504 ms
+#   gthread   68 req/s  p50 462 ms  p95  778 ms  p99 1861 ms  (8 threads)
+#   asgi      57 req/s  p50 488 ms  p95  721 ms  p99 2373 ms  (uvicorn worker)
+#
+# gthread is the default: threads keep a worker serving while others wait
+# on YouTube or the database. The ASGI worker (GUNICORN_WORKER_CLASS=
+# uvicorn.workers.UvicornWorker, app AcademiX.asgi) had the lowest p95 but
+# runs the sync views on one thread per worker. Re-run the benchmark with
+# the expected mix on the target hosts before changing this.
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+preload_app = True
+max_requests = 5000
+max_requests_jitter = 500
+
+# No collections in the master while the app is loaded; re-enabled once the
+# loaded heap is frozen, so forked workers inherit collection switched on
+gc.disable()
+
+
+def when_ready(server):
+    from AcademiX.warmup import warm_up
+
+    for name, count, seconds in warm_up(connect=False):
+        server.log.info("warmup %s: %s in %.1f ms", name, count, seconds * 1000)
+    gc.freeze()
+    gc.enable()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        import AcademiX.sqlite  # noqa: F401  Connects the SQLite tuning receiver
+        import AcademiX.prerender  # noqa: F401  Re-renders the landing pages on catalog changes
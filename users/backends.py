@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+AUTH_USER_CACHE_TIMEOUT = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300)
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached User + UserProfile pair for this user"""
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that caches the session's User together with its profile.
+
+    The user is loaded with select_related('profile') so request.user.profile
+    costs no extra query, and the pair is served from the cache on later
+    requests until a User or UserProfile save invalidates it.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            UserModel = get_user_model()
+            try:
+                user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            cache.set(key, user, AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,168 @@
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# dumpdata output that loaddata can load into a freshly migrated database
+DUMPDATA_ARGS = ['--natural-foreign', '--natural-primary', '-e', 'contenttypes', '-e', 'auth.permission']
+
+
+class Writer(threading.Thread):
+    """Commits small transactions to the source database while a backup runs"""
+
+    def __init__(self, path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.active = threading.Event()
+        self.stopped = threading.Event()
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute('CREATE TABLE IF NOT EXISTS snapshot_bench_writes (id INTEGER PRIMARY KEY, value TEXT)')
+        while not self.stopped.is_set():
+            if not self.active.is_set():
+                time.sleep(0.001)
+                continue
+            started = time.monotonic()
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute('INSERT INTO snapshot_bench_writes (value) VALUES (?)', ('x' * 100,))
+                connection.execute('COMMIT')
+                self.latencies.append((time.monotonic() - started) * 1000)
+            except sqlite3.OperationalError:
+                self.errors += 1
+            time.sleep(0.001)
+        connection.close()
+
+    def measure(self):
+        self.latencies = []
+        self.errors = 0
+        self.active.set()
+
+    def results(self, seconds):
+        self.active.clear()
+        latencies = sorted(self.latencies)
+        return {
+            'writes_per_second': len(latencies) / seconds if seconds else 0,
+            'max_write_ms': latencies[-1] if latencies else 0,
+            'write_errors': self.errors,
+        }
+
+
+class Command(BaseCommand):
+    help = ('Compare `snapshot`/`restore_snapshot` with `dumpdata`/`loaddata` on a copy of the SQLite '
+            'database: time, output size, peak memory, and writes served during the backup')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help='Watch events to add to the copy first')
+        # Internal: run inside a subprocess against the benchmark database copy
+        parser.add_argument('--prepare', action='store_true', help='(internal) seed the benchmark database')
+
+    def handle(self, *args, **options):
+        if options['prepare']:
+            return self.prepare(options['rows'])
+
+        database = settings.DATABASES['default']
+        if 'sqlite' not in database['ENGINE']:
+            raise CommandError('benchmark_snapshot copies the SQLite default database; other engines are not supported')
+
+        workdir = Path(tempfile.mkdtemp(prefix='academix-snapshot-bench-'))
+        try:
+            source = workdir / 'source.sqlite3'
+            shutil.copyfile(database['NAME'], source)
+            self.manage(source, 'migrate', '-v0')
+            self.manage(source, 'benchmark_snapshot', '--prepare', '--rows', str(options['rows']))
+            fresh = workdir / 'fresh.sqlite3'
+            self.manage(fresh, 'migrate', '-v0')
+            self.stdout.write(f"Source database: {source.stat().st_size / 2 ** 20:.1f} MB")
+
+            writer = Writer(source)
+            writer.start()
+            results = []
+            try:
+                backups = {
+                    'snapshot': (['snapshot', '--output', str(workdir / 'snapshot')],
+                                 ['restore_snapshot', str(workdir / 'snapshot'), '--noinput'],
+                                 workdir / 'snapshot'),
+                    'dumpdata': (['dumpdata', *DUMPDATA_ARGS, '-o', str(workdir / 'dump.json.gz')],
+                                 ['loaddata', str(workdir / 'dump.json.gz')],
+                                 workdir / 'dump.json.gz'),
+                }
+                for name, (backup_argv, restore_argv, output) in backups.items():
+                    writer.measure()
+                    seconds, rss = self.manage(source, *backup_argv)
+                    result = {'method': name, 'backup_seconds': seconds, 'backup_rss': rss}
+                    result.update(writer.results(seconds))
+
+                    target = workdir / f"restore-{name}.sqlite3"
+                    shutil.copyfile(fresh, target)
+                    result['restore_seconds'], result['restore_rss'] = self.manage(target, *restore_argv)
+                    result['bytes'] = sum(path.stat().st_size for path in (output.glob('*') if output.is_dir() else [output]))
+                    results.append(result)
+            finally:
+                writer.stopped.set()
+                writer.join()
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{'method':<10} {'backup s':>9} {'restore s':>10} {'size MB':>8} {'backup RSS MB':>14} "
+                f"{'restore RSS MB':>15} {'writes/s':>9} {'max write ms':>13} {'errors':>7}"
+            ))
+            for r in results:
+                self.stdout.write(
+                    f"{r['method']:<10} {r['backup_seconds']:>9.2f} {r['restore_seconds']:>10.2f} "
+                    f"{r['bytes'] / 2 ** 20:>8.2f} {r['backup_rss'] / 1024:>14.1f} {r['restore_rss'] / 1024:>15.1f} "
+                    f"{r['writes_per_second']:>9.0f} {r['max_write_ms']:>13.1f} {r['write_errors']:>7}"
+                )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def manage(self, database_path, *argv):
+        """Run a management command against a database file; returns (seconds, peak RSS in KB)"""
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}")
+        # Replicas and shards would point at the real databases
+        env.pop('DATABASE_REPLICA_URL', None)
+        env.pop('DATABASE_SHARD_URLS', None)
+        started = time.monotonic()
+        process = subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), *argv],
+            env=env, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        stderr = process.stderr.read()
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.monotonic() - started
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode:
+            raise CommandError(f"{' '.join(argv)} failed:\n{stderr.decode(errors='replace')[-2000:]}")
+        return seconds, usage.ru_maxrss
+
+    def prepare(self, rows):
+        """Add watch events so the database is big enough to measure"""
+        from django.contrib.auth.models import User
+        from videos.models import Topic, WatchEvent
+
+        user_ids = list(User.objects.values_list('id', flat=True))
+        topics = list(Topic.objects.values_list('id', 'course_id'))
+        if not user_ids or not topics:
+            raise CommandError('The benchmark needs at least one user and one topic')
+
+        rng = random.Random(0)
+        for start in range(0, rows, 10000):
+            events = []
+            for _ in range(min(10000, rows - start)):
+                topic_id, course_id = rng.choice(topics)
+                events.append(WatchEvent(
+                    user_id=rng.choice(user_ids), topic_id=topic_id, course_id=course_id,
+                    seconds=rng.randrange(600), completed=rng.random() < 0.2,
+                ))
+            WatchEvent.objects.bulk_create(events)
@@ -0,0 +1,131 @@
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.models import User
+from django.contrib.messages.storage import default_storage
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import RequestFactory
+from django.utils import timezone
+
+from videos.models import Course, Field, Topic, VideoProgress
+
+
+def _normalized(html):
+    """Rendered HTML with whitespace runs collapsed and CSRF tokens (random per render) blanked"""
+    html = re.sub(r'[A-Za-z0-9]{64}', 'CSRF', html)
+    # Django and MarkupSafe spell these escapes differently
+    html = html.replace('&#x27;', '&#39;').replace('&quot;', '&#34;')
+    return re.sub(r'\s+', ' ', re.sub(r'>\s+<', '><', html)).strip()
+
+
+def _evaluated(model, objects):
+    """A queryset already holding objects, as the views pass once they've iterated it"""
+    queryset = model.objects.all()
+    queryset._result_cache = objects
+    queryset._prefetch_done = True
+    return queryset
+
+
+class Command(BaseCommand):
+    help = ('Render the templates ported to Jinja2 (jinja2/) with both engines on growing in-memory '
+            'contexts; reports ms per render and checks both engines produce the same HTML')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000', help='Topics/courses/videos per context')
+        parser.add_argument('--repeat', type=int, default=20, help='Renders timed per template and size')
+
+    def handle(self, *args, **options):
+        from AcademiX.jinja2 import Jinja2
+
+        names = sorted(path.name for path in (settings.BASE_DIR / 'jinja2').glob('*.html') if path.name != 'base.html')
+        django_engine = next(engine for engine in engines.all() if engine.__class__.__name__ == 'DjangoTemplates')
+        jinja_engine = Jinja2({
+            'NAME': 'benchmark', 'DIRS': [settings.BASE_DIR / 'jinja2'], 'APP_DIRS': False,
+            'OPTIONS': {
+                'environment': 'AcademiX.jinja2.environment',
+                'templates': names,
+                'auto_reload': False,
+                'context_processors': [
+                    'django.contrib.auth.context_processors.auth',
+                    'django.contrib.messages.context_processors.messages',
+                ],
+            },
+        })
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'template':<26} {'size':>5} {'django ms':>10} {'jinja2 ms':>10} {'speedup':>8}  same HTML"
+        ))
+        for name in names:
+            django_template = django_engine.get_template(name)
+            jinja_template = jinja_engine.get_template(name)
+            for size in map(int, options['sizes'].split(',')):
+                context = self.context(name, size)
+                timings = []
+                outputs = []
+                for template in (django_template, jinja_template):
+                    request = self.request()
+                    outputs.append(template.render(context, request))
+                    started = time.perf_counter()
+                    for _ in range(options['repeat']):
+                        template.render(context, request)
+                    timings.append((time.perf_counter() - started) * 1000 / options['repeat'])
+                same = _normalized(outputs[0]) == _normalized(outputs[1])
+                self.stdout.write(
+                    f"{name:<26} {size:>5} {timings[0]:>10.2f} {timings[1]:>10.2f} "
+                    f"{timings[0] / timings[1]:>7.1f}x  {'yes' if same else 'NO'}"
+                )
+
+    def request(self):
+        request = RequestFactory().get('/')
+        request.user = User(id=1, username='benchmark', first_name='Ada')
+        request.session = SessionBase()
+        request._messages = default_storage(request)
+        request._messages.add(messages.SUCCESS, 'Progress saved')
+        return request
+
+    def context(self, name, size):
+        field = Field(id=1, name='Computer Science', description='Programs and machines')
+        course = Course(id=1, title='Machine Learning', field=field, image='course_images/ml.jpg',
+                        description='Models that learn from data. ' * 10, enrolled_count=1234)
+        topics = []
+        for i in range(size):
+            topic = Topic(
+                id=i + 1, course=course, name=f"Lecture {i + 1}: gradient descent & friends",
+                url=f"https://www.youtube.com/embed/video{i:06d}", video_id=f"video{i:06d}",
+                description='A walk through the maths <and> the code. ' * 8 if i % 3 else '',
+            )
+            topic.progress = VideoProgress(topic=topic, completed=bool(i % 2), watch_duration=60) if i % 4 else None
+            topics.append(topic)
+        topics = _evaluated(Topic, topics)
+
+        if name == 'dashboard.html':
+            now = timezone.now()
+            recent = [VideoProgress(topic=topic, completed=bool(i % 2), watched_date=now - timedelta(hours=i))
+                      for i, topic in enumerate(topics)]
+            return {
+                'course_count': 3, 'videos_watched': size, 'videos_completed': size // 2,
+                'completion_percentage': 50.0, 'streak_days': 4, 'longest_streak': 9,
+                'recent_videos': recent, 'recommended_videos': topics,
+            }
+        if name == 'topics.html':
+            return {
+                'course': course, 'topics': topics, 'completed_count': size // 2,
+                'my_rank': 3, 'ranked_learners': 40, 'top_learners': [],
+            }
+        if name == 'course-registration.html':
+            fields = []
+            for f in range(max(1, size // 20)):
+                field = Field(id=f + 1, name=f"Field {f + 1}", description='' if f % 2 else 'About this field',
+                              course_count=20)
+                courses = [Course(id=f * 20 + c + 1, title=f"Course {c + 1}", field=field, enrolled_count=c,
+                                  description='Learn it all. ' * 12 if c % 2 else '') for c in range(20)]
+                # As prefetch_related('courses') would leave it
+                field._prefetched_objects_cache = {'courses': _evaluated(Course, courses)}
+                fields.append(field)
+            return {'fields': fields}
+        raise CommandError(f"No benchmark context for {name}")
@@ -0,0 +1,26 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from users.assets import BUNDLE_DIR, build_bundles, bundle_root
+
+
+class Command(BaseCommand):
+    help = 'Concatenate and minify ASSET_BUNDLES, then collect them as hashed, pre-compressed static files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-collect', action='store_true',
+            help="Only write the bundles to ASSET_BUNDLE_ROOT, don't run collectstatic",
+        )
+
+    def handle(self, *args, **options):
+        sizes = build_bundles(bundle_root())
+        for name, size in sizes.items():
+            self.stdout.write(f"{BUNDLE_DIR}/{name}: {size} bytes")
+
+        if not options['no_collect']:
+            # CompressedManifestStaticFilesStorage adds the content hash and
+            # writes .gz/.br siblings for WhiteNoise to serve
+            call_command('collectstatic', interactive=False, verbosity=options['verbosity'])
+
+        self.stdout.write(self.style.SUCCESS(f"Built {len(sizes)} asset bundles"))
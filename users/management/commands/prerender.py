@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from AcademiX.prerender import PrerenderError, prerender_pages
+
+
+class Command(BaseCommand):
+    help = 'Render the anonymous landing pages (PRERENDER_PAGES) to static HTML served by the prerender middleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='URL names to render (default: all of PRERENDER_PAGES, '
+                                                     'deleting pages no longer listed)')
+
+    def handle(self, *args, **options):
+        if not settings.PRERENDER_ENABLED:
+            self.stdout.write(self.style.WARNING('PRERENDER_ENABLED is off: the pages are rendered but not served'))
+        try:
+            written = prerender_pages(options['names'] or None)
+        except PrerenderError as e:
+            raise CommandError(str(e))
+        for path in written:
+            self.stdout.write(f"{path} ({path.stat().st_size} bytes)")
+        self.stdout.write(self.style.SUCCESS(f"Pre-rendered {len(written)} pages into {settings.PRERENDER_DIR}"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from AcademiX.snapshots import SnapshotError, read_manifest, restore_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Restore databases from a `manage.py snapshot` directory after verifying its checksums'
+
+    def add_arguments(self, parser):
+        parser.add_argument('snapshot', help='Snapshot directory')
+        parser.add_argument('--database', action='append', dest='databases',
+                            help='Database alias to restore (repeatable, default: all in the snapshot)')
+        parser.add_argument('--verify-only', action='store_true', help='Only check the checksums')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation')
+
+    def handle(self, *args, **options):
+        try:
+            if options['verify_only']:
+                manifest = read_manifest(options['snapshot'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"Snapshot from {manifest['created_at']} is intact ({', '.join(manifest['databases'])})"
+                ))
+                return
+
+            if options['interactive']:
+                answer = input(
+                    'This replaces the current contents of the databases with the snapshot. Type "yes" to continue: '
+                )
+                if answer != 'yes':
+                    raise CommandError('Restore cancelled')
+
+            manifest = restore_snapshot(options['snapshot'], options['databases'])
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        for alias, entry in manifest['databases'].items():
+            if 'restore_seconds' in entry:
+                self.stdout.write(f"Restored {alias} in {entry['restore_seconds']:.2f}s")
+        self.stdout.write(self.style.SUCCESS(f"Restored snapshot from {manifest['created_at']}"))
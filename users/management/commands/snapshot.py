@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from AcademiX.snapshots import SQLITE_STEP_SLEEP, SnapshotError, prune_snapshots, take_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Take a consistent, compressed, checksummed snapshot of the databases while the site keeps serving'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append', dest='databases',
+                            help='Database alias to snapshot (repeatable, default: all but the replica)')
+        parser.add_argument('--output', help='Snapshot directory (default: SNAPSHOT_DIR/<timestamp>)')
+        parser.add_argument('--pages', type=int,
+                            help='SQLite pages copied per backup step, -1 for one step '
+                                 '(default: one step in WAL mode, else 1024)')
+        parser.add_argument('--sleep', type=float, default=SQLITE_STEP_SLEEP,
+                            help='Seconds to pause between SQLite backup steps')
+        parser.add_argument('--keep', type=int, help='Afterwards delete all but the newest N snapshots')
+
+    def handle(self, *args, **options):
+        try:
+            directory = take_snapshot(options['databases'], options['output'], options['pages'], options['sleep'])
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f"Snapshot written to {directory}"))
+        if options['keep']:
+            for path in prune_snapshots(options['keep']):
+                self.stdout.write(f"Deleted old snapshot {path}")
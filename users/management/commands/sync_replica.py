@@ -0,0 +1,43 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from AcademiX.db_routers import REPLICA_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the replica file (local stand-in for replication)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep syncing every N seconds instead of copying once',
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        replica = settings.DATABASES.get(REPLICA_DB_ALIAS)
+        if replica is None:
+            raise CommandError('No replica configured; set DATABASE_REPLICA_URL')
+        if 'sqlite' not in primary['ENGINE'] or 'sqlite' not in replica['ENGINE']:
+            raise CommandError('sync_replica only supports SQLite primary and replica databases')
+
+        while True:
+            started = time.monotonic()
+            self.copy(str(primary['NAME']), str(replica['NAME']))
+            self.stdout.write(f"Replica synced in {(time.monotonic() - started) * 1000:.0f} ms")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source_path, target_path):
+        # The online backup API gives a consistent copy while the primary takes writes
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from AcademiX.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Pre-compile templates, resolve URLconfs, open DB connections and prime the catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='append', dest='urls', default=[],
+            help='Afterwards, time a request to this path through the WSGI application (repeatable)',
+        )
+        parser.add_argument('--skip', action='store_true', help='Time the --url requests without warming up first')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if not options['skip']:
+            for name, count, seconds in warm_up():
+                self.stdout.write(f"{name}: {count} in {seconds * 1000:.1f} ms")
+
+        if not options['urls']:
+            self.stdout.write(self.style.SUCCESS(f"Warmed up in {(time.perf_counter() - started) * 1000:.1f} ms"))
+            return
+
+        # Loads the middleware (WhiteNoise indexes static files here), as gunicorn does on import
+        from AcademiX.wsgi import application
+
+        factory = RequestFactory()
+        for i, url in enumerate(options['urls']):
+            request_started = time.perf_counter()
+            status = []
+            response = application(factory.get(url).environ, lambda s, headers: status.append(s))
+            next(iter(response), b'')  # First byte
+            now = time.perf_counter()
+            response.close()
+            self.stdout.write(f"GET {url}: {status[0]} first byte in {(now - request_started) * 1000:.1f} ms")
+            if i == 0:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Start to first byte: {(now - started) * 1000:.1f} ms"
+                ))
@@ -1,9 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
 from PIL import Image
+from .backends import invalidate_cached_user
+from AcademiX.mixins import DirtyFieldsMixin
 
 # Create your models here.
 class ContactForm(models.Model):
@@ -11,7 +13,7 @@ class ContactForm(models.Model):
     email = models.EmailField()
     message = models.TextField(max_length=150)
 
-class UserProfile(models.Model):
+class UserProfile(DirtyFieldsMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     location = models.CharField(max_length=100, blank=True)
     avatar = models.ImageField(upload_to='profile_pics', blank=True, null=True, help_text="Upload your profile picture")
@@ -20,10 +22,11 @@ class UserProfile(models.Model):
  
     
     def save(self, *args, **kwargs):
+        avatar_changed = 'avatar' in self.get_dirty_fields()
         super().save(*args, **kwargs)
         
-        # Resize avatar if it exists
-        if self.avatar:
+        # Resize avatar if a new one was saved
+        if self.avatar and avatar_changed:
             img = Image.open(self.avatar.path)
             if img.height > 300 or img.width > 300:
                 img.thumbnail((300, 300))
@@ -39,10 +42,23 @@ class UserProfile(models.Model):
         return f"{self.user.username}'s Profile"
 
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    # Fixtures (loaddata) bring their own profiles
+    if created and not raw:
         UserProfile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+    # Only a profile already loaded on this user can have unsaved changes, and
+    # DirtyFieldsMixin turns the save into a no-op when it has none
+    profile = instance._state.fields_cache.get('profile')
+    if profile is not None:
+        profile.save()
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
\ No newline at end of file
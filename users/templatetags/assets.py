@@ -0,0 +1,38 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from users.assets import bundle_path, bundles_enabled, get_bundles
+
+register = template.Library()
+
+
+def _bundle_urls(name):
+    """URLs to load for a bundle: the built file, or its sources while developing"""
+    if bundles_enabled():
+        return [static(bundle_path(name))]
+    return [static(source) for source in get_bundles()[name]]
+
+
+@register.simple_tag
+def preload_bundles(*names):
+    """<link rel=preload> tags for the given bundles (all bundles if none given)"""
+    if not bundles_enabled():
+        return ''
+
+    names = names or get_bundles().keys()
+    return format_html_join(
+        '\n',
+        '<link rel="preload" href="{}" as="{}">',
+        ((static(bundle_path(name)), 'style' if name.endswith('.css') else 'script') for name in names),
+    )
+
+
+@register.simple_tag
+def css_bundle(name):
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((url,) for url in _bundle_urls(name)))
+
+
+@register.simple_tag
+def js_bundle(name):
+    return format_html_join('\n', '<script src="{}"></script>', ((url,) for url in _bundle_urls(name)))
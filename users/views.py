@@ -151,12 +151,19 @@ def edit_profile(request):
             messages.error(request, "Email is already in use.")
             return redirect('edit_profile')
 
-        # Update user information
-        user.username = username
-        user.first_name = first_name
-        user.last_name = last_name
-        user.email = email
-        user.save()
+        # Update user information, writing only the columns that changed
+        changed_fields = []
+        for field_name, value in (
+            ('username', username),
+            ('first_name', first_name),
+            ('last_name', last_name),
+            ('email', email),
+        ):
+            if getattr(user, field_name) != value:
+                setattr(user, field_name, value)
+                changed_fields.append(field_name)
+        if changed_fields:
+            user.save(update_fields=changed_fields)
 
         # Update profile information
         profile = user.profile
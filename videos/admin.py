@@ -1,19 +1,120 @@
-from django.contrib import admin
-from .models import Course, UserCourse, Topic, Field, VideoProgress
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.models import User
+from django.db.models import Q, prefetch_related_objects
+from urllib.parse import parse_qs
+from AcademiX.sharding import shard_aliases
+from .models import Course, UserCourse, Topic, Field, VideoProgress, YouTubeQuotaUsage, DailyCourseStat, TopicRefreshRequest
 # Register your models here.
 admin.site.site_header = "RecademiX"
+@admin.action(description="Refresh topics for selected courses")
+def refresh_topics(modeladmin, request, queryset):
+    """Queue a topic refresh per course; `manage.py refresh_topics` does the fetching"""
+    pending = set(TopicRefreshRequest.objects.filter(
+        course__in=queryset, processed_at__isnull=True
+    ).values_list("course_id", flat=True))
+    requests = [
+        TopicRefreshRequest(course_id=course_id, requested_by=request.user)
+        for course_id in queryset.values_list("id", flat=True) if course_id not in pending
+    ]
+    TopicRefreshRequest.objects.bulk_create(requests)
+    modeladmin.message_user(request, f"Queued a topic refresh for {len(requests)} courses ({len(pending)} already queued)", messages.SUCCESS)
 class Courseslist(admin.ModelAdmin):
-    list_display = ("title", "field", "created_at", "description", "image")
+    list_display = ("title", "field", "created_at", "topic_count", "enrolled_count", "description", "image")
+    list_select_related = ("field",)
+    search_fields = ("title",)
+    actions = (refresh_topics,)
 admin.site.register(Course, Courseslist)
 class Userlist(admin.ModelAdmin):
     list_display = ("user", "course")
+    list_select_related = ("user", "course")
+    raw_id_fields = ("user",)
+    autocomplete_fields = ("course",)
+    search_fields = ("user__username",)  # Enables the search box; matched in get_search_results()
+    search_help_text = "Exact username"
+    show_full_result_count = False
+    def get_search_results(self, request, queryset, search_term):
+        # "=" would still be iexact (UPPER() on both sides); plain equality uses the unique index
+        if not search_term:
+            return queryset, False
+        return queryset.filter(user__username=search_term.strip()), False
 admin.site.register(UserCourse, Userlist)
 class Topiclist(admin.ModelAdmin):
     list_display = ("course", "name", "url", "is_recommended", "uploaded", "description", "video_id")
+    list_select_related = ("course",)
+    list_filter = ("is_recommended",)
+    autocomplete_fields = ("course",)
+    search_fields = ("video_id",)  # Enables the search box; matched in get_search_results()
+    search_help_text = "Exact YouTube video id or topic id"
+    date_hierarchy = "uploaded"
+    show_full_result_count = False
+    def get_search_results(self, request, queryset, search_term):
+        # Exact lookups so the video_id index and the primary key are used
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        matches = Q(video_id=search_term)
+        if search_term.isdigit():
+            matches |= Q(id=int(search_term))
+        return queryset.filter(matches), False
 admin.site.register(Topic, Topiclist)
 class Fieldlist(admin.ModelAdmin):
-    list_display = ("name", "description")
+    list_display = ("name", "course_count", "description")
 admin.site.register(Field, Fieldlist)
-admin.site.register(VideoProgress)
-
-
+class ShardListFilter(admin.SimpleListFilter):
+    title = "shard"
+    parameter_name = "shard"
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in shard_aliases()]
+    def queryset(self, request, queryset):
+        return queryset  # Applied in ShardedModelAdmin.get_queryset()
+class ShardedChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # One query per relation for the whole page instead of one per row
+        prefetch_related_objects(self.result_list, *self.model_admin.list_prefetch_related)
+class ShardedModelAdmin(admin.ModelAdmin):
+    """Browse one shard of a sharded model at a time (?shard=<alias>)"""
+    list_filter = (ShardListFilter,)
+    list_select_related = ()  # Related rows live on another database: no joins
+    list_prefetch_related = ()  # Fetched from their own database per page instead
+    show_full_result_count = False
+    def get_changelist(self, request, **kwargs):
+        return ShardedChangeList
+    def get_shard(self, request):
+        shard = request.GET.get("shard")
+        if not shard and "_changelist_filters" in request.GET:
+            shard = parse_qs(request.GET["_changelist_filters"]).get("shard", [None])[0]
+        return shard if shard in shard_aliases() else shard_aliases()[0]
+    def get_queryset(self, request):
+        return super().get_queryset(request).using(self.get_shard(request))
+class Progresslist(ShardedModelAdmin):
+    list_display = ("user", "topic", "completed", "watch_duration", "watched_date")
+    list_prefetch_related = ("user", "topic__course")
+    raw_id_fields = ("user", "topic")
+    search_fields = ("user__username",)
+    search_help_text = "Exact username (pick the user's shard)"
+    date_hierarchy = "watched_date"
+    def get_search_results(self, request, queryset, search_term):
+        # Users live on the default database, so resolve them there instead of joining
+        if not search_term:
+            return queryset, False
+        user_ids = list(User.objects.filter(username=search_term.strip()).values_list("id", flat=True))
+        return queryset.filter(user_id__in=user_ids), False
+admin.site.register(VideoProgress, Progresslist)
+class QuotaUsagelist(admin.ModelAdmin):
+    list_display = ("day", "priority", "units", "requests", "deferred")
+    list_filter = ("priority",)
+    date_hierarchy = "day"
+admin.site.register(YouTubeQuotaUsage, QuotaUsagelist)
+class CourseStatlist(admin.ModelAdmin):
+    list_display = ("day", "course", "seconds", "events", "completions")
+    list_select_related = ("course",)
+    date_hierarchy = "day"
+admin.site.register(DailyCourseStat, CourseStatlist)
+class RefreshRequestlist(admin.ModelAdmin):
+    list_display = ("course", "requested_by", "created_at", "processed_at", "topics_created")
+    list_select_related = ("course", "requested_by")
+    raw_id_fields = ("requested_by",)
+    autocomplete_fields = ("course",)
+admin.site.register(TopicRefreshRequest, RefreshRequestlist)
@@ -0,0 +1,168 @@
+"""Read-only JSON API (v1) for the mobile client.
+
+Responses are compact JSON with an ETag (304 on If-None-Match) and are
+gzipped when the client accepts it. List endpoints take ?fields=a,b for
+sparse field selection; the course catalog paginates with an opaque
+?cursor= and ?limit= (a course's topics are few and come in one page).
+"""
+import base64
+import hashlib
+import json
+from functools import wraps
+
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from AcademiX.db_routers import replica_reads
+from .enrollment import is_enrolled
+from .models import Course, UserCourse
+from .leaderboards import course_rank, top_learners
+from .queries import catalog_courses, catalog_fields, dashboard_summary, topics_with_progress
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def api_view(view):
+    """GET-only, gzipped, login-required (401 JSON instead of a redirect) API view"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        return view(request, *args, **kwargs)
+    return require_GET(gzip_page(replica_reads(wrapper)))
+
+
+def api_response(request, data):
+    """Compact JSON response with a content ETag; 304 if the client has it already"""
+    body = json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def sparse(request, records):
+    """Keep only the ?fields= keys of each record (all keys if not given)"""
+    fields = {name for name in request.GET.get('fields', '').split(',') if name}
+    if not fields:
+        return records
+    return [{key: value for key, value in record.items() if key in fields} for record in records]
+
+
+def paginate(request, queryset, key='id'):
+    """Keyset pagination on an ascending unique key; returns (page, next cursor or None)"""
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        cursor = request.GET.get('cursor')
+        after = int(base64.urlsafe_b64decode(cursor.encode()).decode()) if cursor else None
+    except (ValueError, UnicodeDecodeError):
+        limit, after = DEFAULT_LIMIT, None
+    if after is not None:
+        queryset = queryset.filter(**{f"{key}__gt": after})
+    page = list(queryset.order_by(key)[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, base64.urlsafe_b64encode(str(getattr(page[-1], key)).encode()).decode()
+
+
+def _course_record(course, enrolled_ids=()):
+    return {
+        'id': course.id,
+        'title': course.title,
+        'field_id': course.field_id,
+        'description': course.description,
+        'image': course.image.url if course.image else None,
+        'topics': course.topic_count,
+        'learners': course.enrolled_count,
+        'enrolled': course.id in enrolled_ids,
+    }
+
+
+def _topic_record(topic):
+    progress = getattr(topic, 'progress', None)
+    return {
+        'id': topic.id,
+        'name': topic.name,
+        'video_id': topic.video_id,
+        'url': topic.url,
+        'recommended': topic.is_recommended,
+        'watched': progress.watch_duration if progress else 0,
+        'completed': progress.completed if progress else False,
+    }
+
+
+@api_view
+def catalog(request):
+    """Fields and (paginated) courses with the user's enrollment flags: the course registration screen"""
+    courses = catalog_courses()
+    field_id = request.GET.get('field')
+    if field_id:
+        if not field_id.isdigit():
+            return JsonResponse({'error': 'field must be a field id'}, status=400)
+        courses = courses.filter(field_id=int(field_id))
+    page, cursor = paginate(request, courses)
+    enrolled_ids = set(UserCourse.objects.filter(user=request.user).values_list('course_id', flat=True))
+    
+    return api_response(request, {
+        'fields': list(catalog_fields().values('id', 'name')),
+        'courses': sparse(request, [_course_record(course, enrolled_ids) for course in page]),
+        'next': cursor,
+    })
+
+
+@api_view
+def course_topics(request, course_id):
+    """A course's topics with the user's progress: the topics screen"""
+    try:
+        course = Course.objects.get(id=course_id)
+    except Course.DoesNotExist:
+        return JsonResponse({'error': 'Course not found'}, status=404)
+    if not is_enrolled(request.user.id, course.id):
+        return JsonResponse({'error': 'Not enrolled in this course'}, status=403)
+    
+    topics = topics_with_progress(request.user, course)
+    rank, ranked = course_rank(request.user, course.id)
+    
+    return api_response(request, {
+        'course': _course_record(course, {course.id}),
+        'completed': sum(1 for topic in topics if topic.progress and topic.progress.completed),
+        'total': len(topics),
+        'topics': sparse(request, [_topic_record(topic) for topic in topics]),
+        'rank': rank,
+        'ranked': ranked,
+        'leaders': [
+            {'username': score.user.username, 'score': score.score}
+            for score in top_learners(course.id, limit=5)
+        ],
+    })
+
+
+@api_view
+def dashboard(request):
+    """The dashboard summary"""
+    summary = dashboard_summary(request.user)
+    
+    return api_response(request, {
+        'courses': sparse(request, [_course_record(uc.course, {uc.course_id}) for uc in summary['user_courses']]),
+        'recent': [
+            {'topic_id': progress.topic_id, 'watched': progress.watch_duration,
+             'completed': progress.completed, 'watched_date': progress.watched_date}
+            for progress in summary['recent_videos']
+        ],
+        'recommended': [_topic_record(topic) for topic in summary['recommended_videos']],
+        'stats': {
+            'courses': summary['course_count'],
+            'watched': summary['videos_watched'],
+            'completed': summary['videos_completed'],
+            'completion': round(summary['completion_percentage'], 1),
+            'streak': summary['streak_days'],
+            'longest_streak': summary['longest_streak'],
+        },
+    })
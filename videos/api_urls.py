@@ -0,0 +1,8 @@
+from django.urls import path
+from . import api
+
+urlpatterns = [
+    path('catalog/', api.catalog, name='api_catalog'),
+    path('courses/<int:course_id>/topics/', api.course_topics, name='api_course_topics'),
+    path('dashboard/', api.dashboard, name='api_dashboard'),
+]
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class VideosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'videos'
+
+    def ready(self):
+        # Keep the enrollment bitmaps and denormalized counters in step
+        from . import counters, enrollment_index  # noqa: F401
@@ -0,0 +1,178 @@
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from AcademiX.sharding import shard_aliases
+from .models import VideoProgress
+
+try:
+    import fcntl
+except ImportError:  # Windows: archive runs are not serialized
+    fcntl = None
+
+# Fields stored per archived row, in the same order as live rows are read
+ARCHIVE_FIELDS = ('id', 'user_id', 'topic_id', 'watch_duration', 'completed', 'watched_date')
+
+# Seconds the archived durations are used before the files are checked for changes
+RELOAD_INTERVAL = 1.0
+
+
+def archive_dir():
+    return Path(getattr(settings, 'PROGRESS_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'progress'))
+
+
+def archive_path(month):
+    """Archive file for a 'YYYY-MM' month"""
+    return archive_dir() / f"{month}.jsonl.gz"
+
+
+def _append(month, rows):
+    """Append rows as a new gzip member and flush it to disk before returning"""
+    path = archive_path(month)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='ab') as archive:
+            for row in rows:
+                record = dict(zip(ARCHIVE_FIELDS, row))
+                record['watched_date'] = record['watched_date'].isoformat()
+                archive.write((json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8'))
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+@contextmanager
+def _archive_lock():
+    """Serialize archive runs on this archive directory, so no batch is appended twice"""
+    archive_dir().mkdir(parents=True, exist_ok=True)
+    with open(archive_dir() / '.lock', 'wb') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def archive_progress(cutoff, batch_size=5000, dry_run=False):
+    """Move unfinished VideoProgress rows last watched before cutoff into monthly archives.
+
+    Completed rows stay in the hot table: the topics page, course scores and
+    re-watches (which must not complete and score a video twice) read them.
+    When an archived video is resumed, its duration is carried forward from
+    archived_duration(). Rows are deleted from the hot table only after their
+    batch is durably written, and only if they weren't watched meanwhile.
+    Returns {database alias: rows archived}.
+    """
+    def cold_rows(alias):
+        return VideoProgress.objects.using(alias).filter(watched_date__lt=cutoff, completed=False)
+
+    if dry_run:
+        return {alias: cold_rows(alias).count() for alias in shard_aliases()}
+
+    archived = {}
+    with _archive_lock():
+        for alias in shard_aliases():
+            queryset = cold_rows(alias)
+            archived[alias] = 0
+            while True:
+                batch = list(queryset.order_by('id').values_list(*ARCHIVE_FIELDS)[:batch_size])
+                if not batch:
+                    break
+
+                by_month = defaultdict(list)
+                for row in batch:
+                    by_month[row[-1].strftime('%Y-%m')].append(row)
+                for month, rows in by_month.items():
+                    _append(month, rows)
+
+                queryset.filter(id__in=[row[0] for row in batch]).delete()
+                archived[alias] += len(batch)
+    return archived
+
+
+def iter_archived_progress(since=None, until=None, topic_ids=None):
+    """Yield archived rows as ARCHIVE_FIELDS tuples, reading only the months needed"""
+    if not archive_dir().exists():
+        return
+
+    first_month = since.strftime('%Y-%m') if since else None
+    last_month = until.strftime('%Y-%m') if until else None
+    topic_ids = set(topic_ids) if topic_ids is not None else None
+
+    for path in sorted(archive_dir().glob('*.jsonl.gz')):
+        month = path.name[:7]
+        if (first_month and month < first_month) or (last_month and month > last_month):
+            continue
+
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                record = json.loads(line)
+                watched_date = parse_datetime(record['watched_date'])
+                if (since and watched_date < since) or (until and watched_date > until):
+                    continue
+                if topic_ids is not None and record['topic_id'] not in topic_ids:
+                    continue
+                record['watched_date'] = watched_date
+                yield tuple(record[field] for field in ARCHIVE_FIELDS)
+
+
+class ArchivedDurations:
+    """watch_duration of the latest archived row per (user, topic), loaded from the archive files.
+
+    Kept as sorted NumPy arrays (user_id << 32 | topic_id keys) and reloaded
+    when the set of archive files or their sizes change.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.checked = 0.0
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.durations = np.zeros(0, dtype=np.int64)
+        self.lock = threading.Lock()
+
+    def _version(self):
+        if not archive_dir().exists():
+            return ()
+        return tuple(sorted(
+            (path.name, path.stat().st_mtime_ns, path.stat().st_size) for path in archive_dir().glob('*.jsonl.gz')
+        ))
+
+    def _load(self):
+        rows = [(user_id, topic_id, duration, watched_date.timestamp())
+                for _, user_id, topic_id, duration, _, watched_date in iter_archived_progress()]
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        user_ids, topic_ids, durations, watched = (np.asarray(column) for column in zip(*rows))
+        keys = (user_ids.astype(np.int64) << 32) | topic_ids.astype(np.int64)
+        order = np.lexsort((watched, keys))
+        keys, durations = keys[order], durations[order].astype(np.int64)
+        # Sorted by key, then watched date: keep the last row of each key
+        latest = np.append(keys[1:] != keys[:-1], True)
+        return keys[latest], durations[latest]
+
+    def get(self, user_id, topic_id):
+        with self.lock:
+            if time.monotonic() - self.checked >= RELOAD_INTERVAL:
+                version = self._version()
+                if version != self.version:
+                    self.keys, self.durations = self._load()
+                    self.version = version
+                self.checked = time.monotonic()
+            keys, durations = self.keys, self.durations
+        key = (int(user_id) << 32) | int(topic_id)
+        index = int(np.searchsorted(keys, key))
+        return int(durations[index]) if index < len(keys) and keys[index] == key else 0
+
+
+_archived_durations = ArchivedDurations()
+
+
+def archived_duration(user_id, topic_id):
+    """Seconds already counted for an archived (user, topic) row, 0 if none"""
+    return _archived_durations.get(user_id, topic_id)
@@ -0,0 +1,91 @@
+"""
+Denormalized counters: Course.topic_count, Course.enrolled_count and Field.course_count.
+
+Signals below keep them current with F() increments; bulk inserts, which
+send no signals, call add_topics/add_enrollments, and topic deletes are
+counted once per course by TopicQuerySet.delete (videos.models). `manage.py
+reconcile_counters` recounts them periodically to repair any drift.
+Raw saves (loaddata) are skipped since fixtures carry their own counts.
+"""
+from collections import Counter
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Course, Field, Topic, UserCourse
+
+
+def _adjust(model, pk, field, delta):
+    if pk is not None and delta:
+        model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def add_topics(course_id, count):
+    _adjust(Course, course_id, 'topic_count', count)
+
+
+def add_enrollments(pairs):
+    """Count newly created (user_id, course_id) enrollments"""
+    for course_id, count in Counter(course_id for _, course_id in pairs).items():
+        _adjust(Course, course_id, 'enrolled_count', count)
+
+
+@receiver(post_save, sender=Topic)
+def topic_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        add_topics(instance.course_id, 1)
+
+
+@receiver(post_save, sender=UserCourse)
+def enrollment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _adjust(Course, instance.course_id, 'enrolled_count', 1)
+
+
+@receiver(post_delete, sender=UserCourse)
+def enrollment_deleted(sender, instance, **kwargs):
+    _adjust(Course, instance.course_id, 'enrolled_count', -1)
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_field(sender, instance, raw=False, **kwargs):
+    # A course moved to another field changes both fields' counts
+    if instance.pk and not raw:
+        instance._previous_field_id = Course.objects.filter(pk=instance.pk).values_list('field_id', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous_field_id', instance.field_id)
+    if previous != instance.field_id:
+        _adjust(Field, previous, 'course_count', -1)
+        _adjust(Field, instance.field_id, 'course_count', 1)
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    _adjust(Field, instance.field_id, 'course_count', -1)
+
+
+def _count(model, fk):
+    rows = model.objects.filter(**{fk: OuterRef('pk')}).order_by().values(fk).annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(rows), Value(0))
+
+
+def reconcile_counters():
+    """Recount every counter, rewriting only the rows that drifted; returns {counter: rows fixed}"""
+    topics, enrolled, courses = _count(Topic, 'course'), _count(UserCourse, 'course'), _count(Course, 'field')
+
+    drifted = Course.objects.alias(actual=topics).exclude(topic_count=F('actual')).values_list('pk', flat=True)
+    fixed = {'topic_count': Course.objects.filter(pk__in=list(drifted)).update(topic_count=topics)}
+
+    drifted = Course.objects.alias(actual=enrolled).exclude(enrolled_count=F('actual')).values_list('pk', flat=True)
+    fixed['enrolled_count'] = Course.objects.filter(pk__in=list(drifted)).update(enrolled_count=enrolled)
+
+    drifted = Field.objects.alias(actual=courses).exclude(course_count=F('actual')).values_list('pk', flat=True)
+    fixed['course_count'] = Field.objects.filter(pk__in=list(drifted)).update(course_count=courses)
+    return fixed
@@ -0,0 +1,102 @@
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .counters import add_enrollments
+from .enrollment_index import record_enrollments
+from .models import Course, Topic, TopicRefreshRequest, UserCourse
+
+ENROLL_CHUNK_SIZE = 5000
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve_users(identifiers):
+    """Map user ids or usernames to user ids; unknown identifiers are left out"""
+    ids = {str(value) for value in identifiers if str(value).isdigit()}
+    names = {str(value) for value in identifiers} - ids
+    resolved = {str(user_id): user_id for user_id in User.objects.filter(id__in=ids).values_list('id', flat=True)}
+    if names:
+        resolved.update(User.objects.filter(username__in=names).values_list('username', 'id'))
+    return resolved
+
+
+def is_enrolled(user_id, course_id):
+    """Access check against UserCourse; the per-node bitmaps may be stale, so they only feed analytics"""
+    return UserCourse.objects.filter(user_id=user_id, course_id=course_id).exists()
+
+
+def queue_topic_ingestion(course_ids, requested_by=None):
+    """Queue a topic refresh for the courses that have no topics and none queued"""
+    course_ids = set(course_ids)
+    skip = set(Topic.objects.filter(course_id__in=course_ids).values_list('course_id', flat=True).distinct())
+    skip.update(TopicRefreshRequest.objects.filter(
+        course_id__in=course_ids, processed_at__isnull=True
+    ).values_list('course_id', flat=True))
+    requests = [TopicRefreshRequest(course_id=course_id, requested_by=requested_by) for course_id in course_ids - skip]
+    TopicRefreshRequest.objects.bulk_create(requests)
+    return len(requests)
+
+
+def _enrolled_pairs(user_ids):
+    return set(UserCourse.objects.filter(user_id__in=user_ids).values_list('user_id', 'course_id'))
+
+
+def bulk_enroll(pairs, chunk_size=ENROLL_CHUNK_SIZE, queue_topics=True, requested_by=None):
+    """Enroll many (user_id, course_id) pairs with a few queries per chunk.
+
+    Returns a summary dict: the newly created pairs, how many were already
+    enrolled, unknown user/course ids, and how many topic ingestions were
+    queued for courses without topics.
+    """
+    pairs = {(int(user_id), int(course_id)) for user_id, course_id in pairs}
+    courses = Course.objects.in_bulk({course_id for _, course_id in pairs})
+
+    created = []
+    already_enrolled = 0
+    unknown_users = set()
+    for chunk in _chunks(sorted(pairs), chunk_size):
+        user_ids = {user_id for user_id, _ in chunk}
+        with transaction.atomic():
+            # Locking the users (where supported) makes overlapping bulk enrollments take turns
+            known_users = set(User.objects.select_for_update().filter(id__in=user_ids).values_list('id', flat=True))
+            unknown_users |= user_ids - known_users
+            candidates = [
+                (user_id, course_id) for user_id, course_id in chunk
+                if user_id in known_users and course_id in courses
+            ]
+            existing = _enrolled_pairs(user_ids)
+            # ignore_conflicts skips pairs enrolled since the check; only the
+            # pairs the re-query finds that weren't there before are created
+            UserCourse.objects.bulk_create(
+                [UserCourse(user_id=user_id, course_id=course_id) for user_id, course_id in candidates
+                 if (user_id, course_id) not in existing],
+                ignore_conflicts=True,
+            )
+            inserted = _enrolled_pairs(user_ids) - existing
+            new = [pair for pair in candidates if pair in inserted]
+            # bulk_create sends no post_save, so update the bitmaps and counters directly
+            record_enrollments(new)
+            add_enrollments(new)
+        already_enrolled += len(candidates) - len(new)
+        created.extend(new)
+
+    queued = 0
+    if queue_topics and created:
+        queued = queue_topic_ingestion({course_id for _, course_id in created}, requested_by=requested_by)
+
+    return {
+        'created': created,
+        'already_enrolled': already_enrolled,
+        'unknown_users': sorted(unknown_users),
+        'unknown_courses': sorted({course_id for _, course_id in pairs} - courses.keys()),
+        'queued_topic_refreshes': queued,
+    }
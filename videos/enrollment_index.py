@@ -0,0 +1,197 @@
+"""
+Per-course bitmaps of enrolled user ids.
+
+Each course's enrollments are a NumPy array of 64-bit words where bit
+user_id is set when the user is enrolled, so a course's learner count is a
+popcount and overlap between two courses is an AND plus a popcount. Bitmaps
+are persisted as one .npy file per course in ENROLLMENT_INDEX_DIR and kept
+current by the UserCourse signals below (and bulk_enroll); every process
+reloads a bitmap when its file changes (checked at most every
+RELOAD_INTERVAL seconds), and builds it from UserCourse the first time a
+course is looked up.
+
+The files are per node and can lag behind the table (another node's
+changes, a lost on_commit update, a restore), so they only feed analytics;
+access checks go to UserCourse (videos.enrollment.is_enrolled).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UserCourse
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads are serialized
+    fcntl = None
+
+# Seconds a loaded bitmap is used before its file is checked for changes
+RELOAD_INTERVAL = 1.0
+
+
+def index_dir():
+    return Path(getattr(settings, 'ENROLLMENT_INDEX_DIR', settings.BASE_DIR / 'cache' / 'enrollments'))
+
+
+def _bitmap(user_ids):
+    user_ids = np.asarray(list(user_ids), dtype=np.int64)
+    words = np.zeros(int(user_ids.max()) // 64 + 1 if len(user_ids) else 0, dtype=np.uint64)
+    np.bitwise_or.at(words, user_ids // 64, np.left_shift(np.uint64(1), (user_ids % 64).astype(np.uint64)))
+    return words
+
+
+def _with_bits(words, user_ids, enabled):
+    """Copy of words with the bits for user_ids set (or cleared)"""
+    user_ids = np.asarray(list(user_ids), dtype=np.int64)
+    if not enabled:
+        user_ids = user_ids[user_ids < len(words) * 64]
+    if not len(user_ids):
+        return words
+    bits = _bitmap(user_ids)
+    result = np.zeros(max(len(words), len(bits)), dtype=np.uint64)
+    result[:len(words)] = words
+    if enabled:
+        result[:len(bits)] |= bits
+    else:
+        result[:len(bits)] &= ~bits
+    return result
+
+
+class EnrollmentIndex:
+    """Loads, caches and updates the per-course bitmaps of one process"""
+
+    def __init__(self):
+        self.bitmaps = {}  # course_id -> (file version, words, time.monotonic() of the check)
+        self.lock = threading.Lock()
+
+    def path(self, course_id):
+        return index_dir() / f"{course_id}.npy"
+
+    @contextmanager
+    def _locked(self, course_id):
+        """Serialize changes to a course's bitmap across threads and processes"""
+        index_dir().mkdir(parents=True, exist_ok=True)
+        with self.lock, open(index_dir() / f"{course_id}.lock", 'wb') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _version(self, course_id):
+        # Every save replaces the file, so a changed inode/mtime/size means a new bitmap
+        stat = self.path(course_id).stat()
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _save(self, course_id, words):
+        path = self.path(course_id)
+        temporary = path.with_suffix('.tmp.npy')
+        np.save(temporary, words)
+        os.replace(temporary, path)
+        self.bitmaps[course_id] = (self._version(course_id), words, time.monotonic())
+
+    def _build(self, course_id):
+        user_ids = UserCourse.objects.using(DEFAULT_DB_ALIAS).filter(course_id=course_id).values_list(
+            'user_id', flat=True
+        )
+        self._save(course_id, _bitmap(user_ids))
+
+    def bitmap(self, course_id):
+        """The course's bitmap, reloaded if another process changed it"""
+        cached = self.bitmaps.get(course_id)
+        if cached is not None and time.monotonic() - cached[2] < RELOAD_INTERVAL:
+            return cached[1]
+        try:
+            version = self._version(course_id)
+        except FileNotFoundError:
+            with self._locked(course_id):
+                if not self.path(course_id).exists():
+                    self._build(course_id)
+            return self.bitmap(course_id)
+
+        if cached is None or cached[0] != version:
+            cached = (version, np.load(self.path(course_id)), time.monotonic())
+        else:
+            cached = (version, cached[1], time.monotonic())
+        self.bitmaps[course_id] = cached
+        return cached[1]
+
+    def update(self, course_id, added=(), removed=()):
+        """Set the bits of newly enrolled users and clear those of removed ones"""
+        with self._locked(course_id):
+            if not self.path(course_id).exists():
+                # Built from the committed rows, which already include this change
+                self._build(course_id)
+                return
+            words = np.load(self.path(course_id))
+            words = _with_bits(words, added, True)
+            words = _with_bits(words, removed, False)
+            self._save(course_id, words)
+
+    def rebuild(self, course_ids=None):
+        """Rebuild bitmaps from UserCourse with one query; returns the number of courses"""
+        enrollments = UserCourse.objects.using(DEFAULT_DB_ALIAS).order_by('course_id')
+        if course_ids is not None:
+            enrollments = enrollments.filter(course_id__in=course_ids)
+        by_course = {course_id: [] for course_id in course_ids or ()}
+        for course_id, user_id in enrollments.values_list('course_id', 'user_id').iterator(chunk_size=10000):
+            by_course.setdefault(course_id, []).append(user_id)
+        for course_id, user_ids in by_course.items():
+            with self._locked(course_id):
+                self._save(course_id, _bitmap(user_ids))
+        return len(by_course)
+
+    def count(self, course_id):
+        return int(np.bitwise_count(self.bitmap(course_id)).sum())
+
+    def counts(self, course_ids):
+        """{course_id: enrolled users}"""
+        return {course_id: self.count(course_id) for course_id in course_ids}
+
+    def overlap(self, course_a, course_b):
+        """How many users are enrolled in both courses"""
+        a, b = self.bitmap(course_a), self.bitmap(course_b)
+        size = min(len(a), len(b))
+        return int(np.bitwise_count(a[:size] & b[:size]).sum())
+
+    def overlaps(self, course_id, other_ids):
+        """{other course_id: users enrolled in both}, largest first, zero overlaps dropped"""
+        overlaps = {other: self.overlap(course_id, other) for other in other_ids if other != course_id}
+        return dict(sorted(((other, n) for other, n in overlaps.items() if n), key=lambda item: -item[1]))
+
+
+enrollment_index = EnrollmentIndex()
+
+
+def record_enrollments(pairs, enrolled=True):
+    """Update the index for (user_id, course_id) pairs once the transaction commits"""
+    by_course = {}
+    for user_id, course_id in pairs:
+        by_course.setdefault(course_id, []).append(user_id)
+
+    def apply():
+        for course_id, user_ids in by_course.items():
+            if enrolled:
+                enrollment_index.update(course_id, added=user_ids)
+            else:
+                enrollment_index.update(course_id, removed=user_ids)
+
+    if by_course:
+        transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=UserCourse)
+def usercourse_saved(sender, instance, created, **kwargs):
+    if created:
+        record_enrollments([(instance.user_id, instance.course_id)])
+
+
+@receiver(post_delete, sender=UserCourse)
+def usercourse_deleted(sender, instance, **kwargs):
+    record_enrollments([(instance.user_id, instance.course_id)], enrolled=False)
@@ -0,0 +1,174 @@
+import csv
+import json
+import zlib
+from datetime import datetime, time
+from itertools import chain, islice
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from AcademiX.sharding import iter_all_shards
+from .archive import ARCHIVE_FIELDS, iter_archived_progress
+from .models import Topic, VideoProgress
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    'id',
+    'user_id',
+    'username',
+    'course_id',
+    'course_title',
+    'topic_id',
+    'topic_name',
+    'video_id',
+    'watch_duration',
+    'completed',
+    'watched_date',
+]
+
+# Topic details are cached across batches up to this many entries
+TOPIC_CACHE_SIZE = 10000
+
+# Flush to the client once this many bytes have been buffered
+BUFFER_SIZE = 64 * 1024
+
+
+def parse_export_date(value, end_of_day=False):
+    """Parse a date or datetime string into an aware datetime (None if empty)"""
+    if not value:
+        return None
+
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def progress_export_rows(course_id=None, since=None, until=None, chunk_size=EXPORT_CHUNK_SIZE,
+                         include_archive=False):
+    """Yield VideoProgress rows joined with user, topic and course as tuples.
+
+    Progress is streamed shard by shard with .iterator() (server-side cursor
+    on PostgreSQL) and joined in Python against users and topics fetched per
+    batch from the default database, since the tables may live apart.
+    With include_archive, archived rows (videos.archive) are streamed first.
+    """
+    queryset = VideoProgress.objects.all()
+    topic_ids = None
+    if course_id:
+        topic_ids = list(Topic.objects.filter(course_id=course_id).values_list('id', flat=True))
+        queryset = queryset.filter(topic_id__in=topic_ids)
+    if since:
+        queryset = queryset.filter(watched_date__gte=since)
+    if until:
+        queryset = queryset.filter(watched_date__lte=until)
+
+    queryset = queryset.order_by('id').values_list(*ARCHIVE_FIELDS)
+    rows = iter_all_shards(queryset, chunk_size=chunk_size)
+    if include_archive:
+        rows = chain(iter_archived_progress(since, until, topic_ids), rows)
+
+    topics = {}
+    for batch in _batches(rows, chunk_size):
+        missing = {row[2] for row in batch} - topics.keys()
+        if missing:
+            if len(topics) + len(missing) > TOPIC_CACHE_SIZE:
+                topics.clear()
+                missing = {row[2] for row in batch}
+            topics.update(
+                (topic_id, rest) for topic_id, *rest in Topic.objects.filter(id__in=missing).values_list(
+                    'id', 'course_id', 'course__title', 'name', 'video_id'
+                )
+            )
+        usernames = dict(
+            User.objects.filter(id__in={row[1] for row in batch}).values_list('id', 'username')
+        )
+
+        for progress_id, user_id, topic_id, watch_duration, completed, watched_date in batch:
+            course_id, course_title, topic_name, video_id = topics.get(topic_id, (None, None, None, None))
+            yield (
+                progress_id, user_id, usernames.get(user_id), course_id, course_title,
+                topic_id, topic_name, video_id, watch_duration, completed, watched_date,
+            )
+
+
+class _Echo:
+    """File-like object whose write() just returns the value (for csv.writer)"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        )
+
+
+def _jsonl_lines(rows):
+    for row in rows:
+        record = {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in zip(EXPORT_COLUMNS, row)
+        }
+        yield json.dumps(record, separators=(',', ':')) + '\n'
+
+
+def _buffered(lines):
+    """Group small text lines into roughly BUFFER_SIZE byte chunks"""
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _gzipped(chunks):
+    """Compress a stream of byte chunks into a single gzip stream on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_progress_export(export_format='csv', compress=False, **filters):
+    """Return an iterator of bytes for a progress export in constant memory"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    rows = progress_export_rows(**filters)
+    lines = _csv_lines(rows) if export_format == 'csv' else _jsonl_lines(rows)
+    chunks = _buffered(lines)
+    if compress:
+        chunks = _gzipped(chunks)
+    return chunks
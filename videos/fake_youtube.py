@@ -0,0 +1,83 @@
+"""
+Stand-in for the YouTube Data API used by `manage.py benchmark_serving`.
+
+A plain ASGI app (no Django) answering /search, /videos and /playlistItems
+with canned results after an injected delay, so load tests exercise real
+network waits without spending quota:
+
+    FAKE_YOUTUBE_LATENCY_MS=300 uvicorn videos.fake_youtube:app --port 8765
+"""
+import asyncio
+import json
+import os
+import random
+from urllib.parse import parse_qs
+
+LATENCY_MS = float(os.getenv('FAKE_YOUTUBE_LATENCY_MS', '300'))
+JITTER = 0.2  # +/- fraction of the latency
+
+
+def _search(params):
+    count = int(params.get('maxResults', ['10'])[0])
+    query = params.get('q', [''])[0]
+    return {'items': [
+        {
+            'id': {'videoId': f"bench{random.randrange(10 ** 6):06d}"},
+            'snippet': {
+                'title': f"{query} #{i + 1}",
+                'description': f"Benchmark video {i + 1} for {query}",
+                'channelTitle': 'Benchmark',
+                'publishedAt': '2024-01-01T00:00:00Z',
+                'thumbnails': {'medium': {'url': 'https://i.ytimg.com/vi/bench/mqdefault.jpg'}},
+            },
+        }
+        for i in range(count)
+    ]}
+
+
+def _playlist_items(params):
+    # A 1,000 video playlist, paged like the real API
+    total = int(os.getenv('FAKE_YOUTUBE_PLAYLIST_SIZE', '1000'))
+    count = int(params.get('maxResults', ['5'])[0])
+    start = int(params.get('pageToken', ['0'])[0])
+    end = min(start + count, total)
+    page = {'items': [
+        {
+            'snippet': {
+                'title': f"Playlist video {i + 1}",
+                'description': f"Benchmark playlist video {i + 1}",
+                'videoOwnerChannelTitle': 'Benchmark',
+                'publishedAt': '2024-01-01T00:00:00Z',
+                'thumbnails': {'medium': {'url': 'https://i.ytimg.com/vi/bench/mqdefault.jpg'}},
+            },
+            'contentDetails': {'videoId': f"pl{i:08d}"},
+        }
+        for i in range(start, end)
+    ]}
+    if end < total:
+        page['nextPageToken'] = str(end)
+    return page
+
+
+def _videos(params):
+    ids = params.get('id', [''])[0].split(',')
+    return {'items': [
+        {'id': video_id, 'contentDetails': {'duration': 'PT12M30S'}, 'statistics': {'viewCount': '1000'}}
+        for video_id in ids if video_id
+    ]}
+
+
+async def app(scope, receive, send):
+    if scope['type'] != 'http':
+        return
+    params = parse_qs(scope['query_string'].decode())
+    endpoint = scope['path'].rstrip('/').rsplit('/', 1)[-1]
+    handler = {'search': _search, 'videos': _videos, 'playlistItems': _playlist_items}.get(endpoint)
+    await asyncio.sleep(LATENCY_MS / 1000 * random.uniform(1 - JITTER, 1 + JITTER))
+
+    if handler is None:
+        status, body = 404, {'error': {'message': 'Not found'}}
+    else:
+        status, body = 200, handler(params)
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': json.dumps(body).encode()})
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import CourseScore, CourseScoreBucket, LearningStreak
+
+
+def update_streak(user, day=None):
+    """Extend or restart the user's daily streak; writes at most once per day"""
+    day = day or timezone.localdate()
+    streak, created = LearningStreak.objects.get_or_create(
+        user=user, defaults={'current_days': 1, 'longest_days': 1, 'last_active': day}
+    )
+    if created or streak.last_active == day:
+        return streak
+
+    if streak.last_active == day - timedelta(days=1):
+        streak.current_days += 1
+    else:
+        streak.current_days = 1
+    streak.longest_days = max(streak.longest_days, streak.current_days)
+    streak.last_active = day
+    streak.save()
+    return streak
+
+
+def current_streak(streak, day=None):
+    """Days in the streak as of today (0 if the user missed yesterday)"""
+    day = day or timezone.localdate()
+    if streak is None or streak.last_active is None or streak.last_active < day - timedelta(days=1):
+        return 0
+    return streak.current_days
+
+
+def _move_bucket(course_id, score, delta):
+    if score <= 0:
+        return  # Only learners with a positive score are ranked
+    buckets = CourseScoreBucket.objects.filter(course_id=course_id, score=score)
+    if delta < 0:
+        # Never below zero, and never create a bucket just to take users out of it
+        buckets.filter(users__gte=-delta).update(users=F('users') + delta)
+        return
+    bucket, created = CourseScoreBucket.objects.get_or_create(
+        course_id=course_id, score=score, defaults={'users': delta}
+    )
+    if not created:
+        buckets.update(users=F('users') + delta)
+
+
+def add_course_score(user_id, course_id, delta):
+    """Change the user's score in a course by delta, keeping the rank buckets in step"""
+    if not delta:
+        return
+    with transaction.atomic():
+        score, _ = CourseScore.objects.select_for_update().get_or_create(user_id=user_id, course_id=course_id)
+        old = score.score
+        score.score = max(old + delta, 0)
+        score.save()
+        if score.score != old:
+            _move_bucket(course_id, old, -1)
+            _move_bucket(course_id, score.score, 1)
+
+
+def record_activity(user, course_id, completion_delta):
+    """Update streak and course score for one progress report"""
+    update_streak(user)
+    add_course_score(user.pk, course_id, completion_delta)
+
+
+def top_learners(course_id, limit=10):
+    """Highest scores in a course, read in index order"""
+    return list(
+        CourseScore.objects.filter(course_id=course_id, score__gt=0)
+        .select_related('user').order_by('-score', 'reached_at')[:limit]
+    )
+
+
+def course_rank(user, course_id):
+    """(rank, ranked learners) for the user in a course; rank is None without a score"""
+    buckets = CourseScoreBucket.objects.filter(course_id=course_id, users__gt=0)
+    total = buckets.aggregate(total=Sum('users'))['total'] or 0
+    score = CourseScore.objects.filter(user=user, course_id=course_id).values_list('score', flat=True).first()
+    if not score:
+        return None, total
+    ahead = buckets.filter(score__gt=score).aggregate(ahead=Sum('users'))['ahead'] or 0
+    return ahead + 1, total
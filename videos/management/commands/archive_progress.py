@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from AcademiX.sharding import shard_aliases
+from videos.archive import archive_dir, archive_progress
+
+
+class Command(BaseCommand):
+    help = 'Move unfinished VideoProgress rows older than the archive horizon into compressed monthly archive files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=settings.PROGRESS_ARCHIVE_DAYS,
+            help='Archive unfinished rows last watched more than this many days ago',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+        parser.add_argument('--vacuum', action='store_true', help='VACUUM SQLite databases afterwards to reclaim space')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        archived = archive_progress(cutoff, batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        for alias, count in archived.items():
+            self.stdout.write(f"{verb} {count} rows from {alias}")
+
+        if options['vacuum'] and not options['dry_run']:
+            for alias in shard_aliases():
+                connection = connections[alias]
+                if connection.vendor == 'sqlite':
+                    with connection.cursor() as cursor:
+                        cursor.execute('VACUUM')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {sum(archived.values())} rows older than {cutoff:%Y-%m-%d} into {archive_dir()}"
+        ))
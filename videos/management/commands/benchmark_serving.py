@@ -0,0 +1,329 @@
+import asyncio
+import json
+import os
+import random
+import secrets
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Server command lines per deployment model; all use gunicorn.conf.py (preload + warmup)
+DEPLOYMENTS = {
+    'sync': ['gunicorn', '-k', 'sync', '-w', '{workers}', 'AcademiX.wsgi'],
+    'gthread': ['gunicorn', '-k', 'gthread', '-w', '{workers}', '--threads', '{threads}', 'AcademiX.wsgi'],
+    'asgi': ['gunicorn', '-k', 'uvicorn.workers.UvicornWorker', '-w', '{workers}', 'AcademiX.asgi'],
+}
+
+# SQLite configurations (AcademiX.sqlite) each deployment can be run under
+SQLITE_MODES = {
+    'rollback': {'SQLITE_TUNING': '0', 'SQLITE_WRITE_QUEUE': '0'},
+    'wal': {'SQLITE_TUNING': '1', 'SQLITE_WRITE_QUEUE': '0'},
+    'wal+queue': {'SQLITE_TUNING': '1', 'SQLITE_WRITE_QUEUE': '1'},
+}
+
+# Relative weights of each request type in the traffic mix
+DEFAULT_MIX = 'dashboard=40,course_topics=30,track_progress=20,enroll=5,refresh=5'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = ('Load-test sync, gthread and ASGI gunicorn deployments with a realistic request mix '
+            'against a latency-injected YouTube stub; reports throughput and p50/p95/p99 latency')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--deployment', action='append', dest='deployments', choices=DEPLOYMENTS,
+                            help='Deployment model to test (repeatable, default: all)')
+        parser.add_argument('--sqlite-mode', action='append', dest='sqlite_modes', choices=SQLITE_MODES,
+                            help='SQLite configuration to run each deployment under (repeatable, default: wal+queue)')
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=8, help='Threads per gthread worker')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent simulated users')
+        parser.add_argument('--duration', type=float, default=20, help='Measured seconds per deployment')
+        parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds before measuring')
+        parser.add_argument('--youtube-latency-ms', type=float, default=300)
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Request mix weights (default: {DEFAULT_MIX})')
+        parser.add_argument('--users', type=int, default=50, help='Distinct logged-in users')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+        # Internal: run inside a subprocess against the benchmark database copy
+        parser.add_argument('--prepare', action='store_true', help='(internal) seed the benchmark database')
+
+    def handle(self, *args, **options):
+        if options['prepare']:
+            return self.prepare(options['users'])
+
+        try:
+            mix = {name: float(weight) for name, weight in (item.split('=') for item in options['mix'].split(','))}
+        except ValueError:
+            raise CommandError(f"Invalid --mix: {options['mix']}")
+        unknown = set(mix) - set(Runner.OPERATIONS)
+        if unknown:
+            raise CommandError(f"Unknown request types in --mix: {', '.join(sorted(unknown))}")
+
+        database = settings.DATABASES['default']
+        if 'sqlite' not in database['ENGINE']:
+            raise CommandError('benchmark_serving copies the SQLite default database; other engines are not supported')
+
+        workdir = Path(tempfile.mkdtemp(prefix='academix-bench-'))
+        processes = []
+        try:
+            env = self.environment(workdir, database, options)
+            self.stdout.write(f"Preparing benchmark database in {workdir}")
+            fixtures = self.run_prepare(env, options['users'])
+
+            youtube_port = int(env['YOUTUBE_API_BASE_URL'].rsplit(':', 1)[1])
+            processes.append(self.start(
+                [sys.executable, '-m', 'uvicorn', 'videos.fake_youtube:app', '--port', str(youtube_port),
+                 '--log-level', 'warning'], env, workdir / 'youtube.log',
+            ))
+
+            results = []
+            for mode in options['sqlite_modes'] or ['wal+queue']:
+                for name in options['deployments'] or list(DEPLOYMENTS):
+                    # Each run starts from the prepared database; WAL mode sticks to the file
+                    mode_env = dict(env, **SQLITE_MODES[mode])
+                    run_database = workdir / f"{mode}-{name}.sqlite3"
+                    shutil.copyfile(workdir / 'bench.sqlite3', run_database)
+                    mode_env['DATABASE_URL'] = f"sqlite:///{run_database}"
+
+                    port = _free_port()
+                    argv = [arg.format(**options) for arg in DEPLOYMENTS[name]]
+                    argv = [sys.executable, '-m', *argv, '-c', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+                            '--bind', f"127.0.0.1:{port}"]
+                    log_path = workdir / f"{mode}-{name}.log"
+                    server = self.start(argv, mode_env, log_path)
+                    try:
+                        base_url = f"http://127.0.0.1:{port}"
+                        self.wait_until_ready(base_url, server, log_path)
+                        runner = Runner(base_url, fixtures, mix, options['concurrency'], random.Random(options['seed']))
+                        result = asyncio.run(runner.run(options['warmup'], options['duration']))
+                    finally:
+                        self.stop(server)
+                    result.update(deployment=name, sqlite_mode=mode, workers=options['workers'],
+                                  threads=options['threads'] if name == 'gthread' else 1)
+                    results.append(result)
+                    self.report(result)
+
+            self.stdout.write('')
+            self.stdout.write(self.style.SUCCESS(
+                f"{'deployment':<10} {'sqlite':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+            ))
+            for result in results:
+                self.stdout.write(
+                    f"{result['deployment']:<10} {result['sqlite_mode']:<10} {result['throughput']:>8.1f} "
+                    f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f} {result['errors']:>7}"
+                )
+            if options['json_path']:
+                with open(options['json_path'], 'w') as f:
+                    json.dump({'options': {key: options[key] for key in (
+                        'workers', 'threads', 'concurrency', 'duration', 'youtube_latency_ms', 'mix', 'users',
+                    )}, 'results': results}, f, indent=2)
+        finally:
+            for process in processes:
+                self.stop(process)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def environment(self, workdir, database, options):
+        """Environment for the prepare step, the servers and the YouTube stub"""
+        shutil.copyfile(database['NAME'], workdir / 'bench.sqlite3')
+        env = dict(os.environ)
+        env.update({
+            'DJANGO_SETTINGS_MODULE': 'AcademiX.settings_production',
+            'DJANGO_ALLOWED_HOSTS': '127.0.0.1,localhost',
+            'DATABASE_URL': f"sqlite:///{workdir / 'bench.sqlite3'}",
+            # Prepare without WAL so the copies start in rollback-journal mode
+            'SQLITE_TUNING': '0',
+            'DJANGO_STATIC_ROOT': str(workdir / 'static'),
+            'YOUTUBE_API_BASE_URL': f"http://127.0.0.1:{_free_port()}",
+            'YOUTUBE_API_KEY': 'benchmark',
+            'YOUTUBE_DAILY_QUOTA': str(10 ** 9),
+            'YOUTUBE_QUOTA_BURST': str(10 ** 9),
+            'FAKE_YOUTUBE_LATENCY_MS': str(options['youtube_latency_ms']),
+        })
+        # Replicas and shards would point at the real databases
+        env.pop('DATABASE_REPLICA_URL', None)
+        env.pop('DATABASE_SHARD_URLS', None)
+        return env
+
+    def run_prepare(self, env, users):
+        manage = [sys.executable, str(settings.BASE_DIR / 'manage.py')]
+        subprocess.run([*manage, 'migrate', '-v0'], env=env, check=True, cwd=settings.BASE_DIR)
+        subprocess.run([*manage, 'collectstatic', '--noinput', '-v0'], env=env, check=True, cwd=settings.BASE_DIR)
+        output = subprocess.run(
+            [*manage, 'benchmark_serving', '--prepare', '--users', str(users)],
+            env=env, check=True, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def prepare(self, user_count):
+        """Create logged-in users enrolled in courses; prints the fixtures as JSON"""
+        from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+        from django.contrib.auth.models import User
+        from importlib import import_module
+        from videos.models import Course, Topic, UserCourse
+
+        with_topics = list(Topic.objects.values_list('course_id', flat=True).distinct().order_by('course_id'))
+        if len(with_topics) < 4:
+            raise CommandError('The benchmark needs at least 4 courses with topics')
+        # Refreshes replace topics, so they get their own courses
+        study, refresh = with_topics[:len(with_topics) // 2], with_topics[len(with_topics) // 2:]
+        topics = {}
+        for topic_id, course_id in Topic.objects.filter(course_id__in=study).values_list('id', 'course_id'):
+            topics.setdefault(course_id, []).append(topic_id)
+
+        rng = random.Random(0)
+        User.objects.filter(username__startswith='bench_').delete()
+        User.objects.bulk_create([User(username=f"bench_{i}") for i in range(user_count)])
+        users = list(User.objects.filter(username__startswith='bench_'))
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        fixtures = {'users': [], 'courses': list(Course.objects.values_list('id', flat=True))}
+        enrollments = []
+        for user in users:
+            courses = {'study': rng.sample(study, 2), 'refresh': rng.sample(refresh, 1)}
+            enrollments += [UserCourse(user=user, course_id=course_id) for course_id in courses['study'] + courses['refresh']]
+            session = store()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            fixtures['users'].append({
+                'session': session.session_key,
+                'study': courses['study'],
+                'refresh': courses['refresh'],
+                'topics': [topic_id for course_id in courses['study'] for topic_id in topics[course_id]],
+            })
+        UserCourse.objects.bulk_create(enrollments, ignore_conflicts=True)
+        self.stdout.write(json.dumps(fixtures))
+
+    def start(self, argv, env, log_path):
+        with open(log_path, 'wb') as log:
+            return subprocess.Popen(argv, env=env, cwd=settings.BASE_DIR, stdout=log, stderr=subprocess.STDOUT,
+                                    start_new_session=True)
+
+    def stop(self, process):
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+
+    def wait_until_ready(self, base_url, process, log_path, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                log = log_path.read_text(errors='replace').splitlines()[-20:]
+                raise CommandError(f"Server exited with status {process.returncode}:\n" + '\n'.join(log))
+            try:
+                if httpx.get(f"{base_url}/users/", timeout=5).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise CommandError(f"Server at {base_url} did not become ready in {timeout}s")
+
+    def report(self, result):
+        self.stdout.write(
+            f"{result['deployment']} ({result['sqlite_mode']}): {result['requests']} requests, {result['throughput']:.1f} req/s, "
+            f"p50 {result['p50']:.1f} ms, p95 {result['p95']:.1f} ms, p99 {result['p99']:.1f} ms, "
+            f"{result['errors']} errors"
+        )
+        for name, stats in result['operations'].items():
+            self.stdout.write(
+                f"  {name:<15} {stats['requests']:>6} req  p50 {stats['p50']:>7.1f}  p95 {stats['p95']:>7.1f}  "
+                f"p99 {stats['p99']:>7.1f}  errors {stats['errors']}"
+            )
+
+
+class Runner:
+    """Closed-loop load generator: each simulated user sends its next request when the last one finishes"""
+
+    OPERATIONS = ('dashboard', 'course_topics', 'track_progress', 'enroll', 'refresh')
+
+    def __init__(self, base_url, fixtures, mix, concurrency, rng):
+        self.base_url = base_url
+        self.fixtures = fixtures
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.concurrency = concurrency
+        self.rng = rng
+        self.csrf_token = secrets.token_hex(16)  # Any 32 character secret works as cookie + header
+        self.latencies = {name: [] for name in self.names}
+        self.errors = {name: 0 for name in self.names}
+
+    def request(self, name, user):
+        rng = self.rng
+        if name == 'dashboard':
+            return 'GET', '/videos/dashboard', {}
+        if name == 'course_topics':
+            return 'GET', f"/videos/courses/{rng.choice(user['study'])}/topics/", {}
+        if name == 'track_progress':
+            body = {'topic_id': rng.choice(user['topics']), 'duration': rng.randrange(600), 'completed': rng.random() < 0.2}
+            return 'POST', '/videos/track-progress/', {'json': body}
+        if name == 'enroll':
+            return 'POST', '/videos/course-registration/', {'data': {'course': rng.choice(self.fixtures['courses'])}}
+        return 'POST', f"/videos/refresh-videos/{user['refresh'][0]}/", {}
+
+    async def simulated_user(self, client, index, measure_from, stop_at):
+        user = self.fixtures['users'][index % len(self.fixtures['users'])]
+        cookies = {'sessionid': user['session'], 'csrftoken': self.csrf_token}
+        while time.monotonic() < stop_at:
+            name = self.rng.choices(self.names, self.weights)[0]
+            method, path, kwargs = self.request(name, user)
+            started = time.monotonic()
+            try:
+                response = await client.request(
+                    method, path, cookies=cookies, headers={'X-CSRFToken': self.csrf_token}, **kwargs
+                )
+                failed = response.status_code >= 400 or '/signin' in response.headers.get('location', '')
+            except httpx.HTTPError:
+                failed = True
+            if started >= measure_from:
+                self.latencies[name].append((time.monotonic() - started) * 1000)
+                self.errors[name] += failed
+
+    async def run(self, warmup, duration):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=60) as client:
+            measure_from = time.monotonic() + warmup
+            stop_at = measure_from + duration
+            await asyncio.gather(*(
+                self.simulated_user(client, i, measure_from, stop_at) for i in range(self.concurrency)
+            ))
+
+        def stats(values, errors):
+            values = sorted(values)
+            return {
+                'requests': len(values),
+                'errors': errors,
+                'p50': _percentile(values, 50),
+                'p95': _percentile(values, 95),
+                'p99': _percentile(values, 99),
+            }
+
+        everything = [value for values in self.latencies.values() for value in values]
+        result = stats(everything, sum(self.errors.values()))
+        result['throughput'] = len(everything) / duration
+        result['operations'] = {name: stats(self.latencies[name], self.errors[name]) for name in self.names}
+        return result
@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from videos.exports import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    parse_export_date,
+    stream_progress_export,
+)
+
+
+class Command(BaseCommand):
+    help = 'Stream learning progress (VideoProgress joined with topic, course and user) as CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', '-o', default='-', help='Output file path, "-" for stdout')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output on the fly')
+        parser.add_argument('--course', type=int, help='Only export progress for this course id')
+        parser.add_argument('--since', help='Only rows watched on/after this date (YYYY-MM-DD or ISO datetime)')
+        parser.add_argument('--until', help='Only rows watched on/before this date (YYYY-MM-DD or ISO datetime)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument('--include-archive', action='store_true', help='Also export archived (cold) rows')
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_export_date(options['since'])
+            until = parse_export_date(options['until'], end_of_day=True)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        stream = stream_progress_export(
+            options['format'],
+            compress=options['gzip'],
+            course_id=options['course'],
+            since=since,
+            until=until,
+            chunk_size=options['chunk_size'],
+            include_archive=options['include_archive'],
+        )
+
+        if options['output'] == '-':
+            out = sys.stdout.buffer
+            for chunk in stream:
+                out.write(chunk)
+            out.flush()
+            return
+
+        written = 0
+        with open(options['output'], 'wb') as out:
+            for chunk in stream:
+                out.write(chunk)
+                written += len(chunk)
+
+        self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
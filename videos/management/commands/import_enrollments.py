@@ -0,0 +1,58 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from videos.enrollment import ENROLL_CHUNK_SIZE, bulk_enroll, resolve_users
+
+USER_COLUMNS = ('user', 'user_id', 'username')
+COURSE_COLUMNS = ('course', 'course_id')
+
+
+class Command(BaseCommand):
+    help = 'Enroll users in courses from a CSV with a user (id or username) and a course id column'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='CSV file path, "-" for stdin')
+        parser.add_argument('--chunk-size', type=int, default=ENROLL_CHUNK_SIZE)
+        parser.add_argument('--no-topics', action='store_true', help="Don't queue topic ingestion for new courses")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['csv_file'] == '-':
+            rows = self.read_rows(sys.stdin)
+        else:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as f:
+                rows = self.read_rows(f)
+
+        users = resolve_users({user for user, _ in rows})
+        unresolved = {user for user, _ in rows} - users.keys()
+        pairs = [(users[user], course) for user, course in rows if user in users]
+
+        result = bulk_enroll(pairs, chunk_size=options['chunk_size'], queue_topics=not options['no_topics'])
+
+        if unresolved:
+            self.stderr.write(f"Unknown users: {', '.join(sorted(unresolved)[:20])}")
+        if result['unknown_courses']:
+            self.stderr.write(f"Unknown courses: {', '.join(map(str, result['unknown_courses'][:20]))}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Enrolled {len(result['created'])} pairs ({result['already_enrolled']} already enrolled, "
+            f"{result['queued_topic_refreshes']} topic refreshes queued) in {time.monotonic() - started:.2f}s"
+        ))
+
+    def read_rows(self, f):
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        user_column = next((name for name in USER_COLUMNS if name in fields), None)
+        course_column = next((name for name in COURSE_COLUMNS if name in fields), None)
+        if not user_column or not course_column:
+            raise CommandError(f"CSV needs one of {USER_COLUMNS} and one of {COURSE_COLUMNS} as columns")
+
+        rows = []
+        for line, row in enumerate(reader, start=2):
+            course = row[course_column].strip()
+            if not course.isdigit():
+                raise CommandError(f"Line {line}: invalid course id {course!r}")
+            rows.append((row[user_column].strip(), int(course)))
+        return rows
@@ -0,0 +1,35 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand, CommandError
+
+from videos.models import Course
+from videos.quota import BACKGROUND, QuotaDeferred
+from videos.youtube import import_playlist
+
+
+def playlist_id_from(value):
+    """Accept a playlist id or any YouTube URL with a list= parameter"""
+    query = parse_qs(urlparse(value).query)
+    return query['list'][0] if 'list' in query else value
+
+
+class Command(BaseCommand):
+    help = "Import a YouTube playlist into a course's topics, streaming pages in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('playlist', help='Playlist id or URL')
+        parser.add_argument('--max', type=int, dest='max_results', help='Import at most this many videos')
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(id=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['course_id']} does not exist")
+
+        playlist_id = playlist_id_from(options['playlist'])
+        try:
+            created = import_playlist(course, playlist_id, max_results=options['max_results'], priority=BACKGROUND)
+        except QuotaDeferred as e:
+            raise CommandError(f"Stopped by the YouTube quota scheduler: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} topics from playlist {playlist_id} into {course.title}"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from videos.enrollment_index import enrollment_index, index_dir
+from videos.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-course enrollment bitmaps from UserCourse (backfill/repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help='Only rebuild this course (repeatable, default: all courses)')
+
+    def handle(self, *args, **options):
+        course_ids = options['courses'] or list(Course.objects.values_list('id', flat=True))
+        rebuilt = enrollment_index.rebuild(course_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} course bitmaps in {index_dir()}"))
@@ -0,0 +1,48 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from AcademiX.sharding import iter_all_shards
+from videos.archive import iter_archived_progress
+from videos.models import CourseScore, CourseScoreBucket, Topic, VideoProgress
+
+
+class Command(BaseCommand):
+    help = 'Recompute course scores and rank buckets from completed VideoProgress rows, archived ones included (backfill/repair)'
+
+    def handle(self, *args, **options):
+        topic_courses = dict(Topic.objects.values_list('id', 'course_id'))
+        scores = Counter()
+        completed = VideoProgress.objects.filter(completed=True).values_list('user_id', 'topic_id')
+        counted = set()
+        for user_id, topic_id in iter_all_shards(completed):
+            course_id = topic_courses.get(topic_id)
+            if course_id is not None:
+                scores[(user_id, course_id)] += 1
+                counted.add((user_id, topic_id))
+
+        # Completions moved out by archive_progress still count (once, if watched again since)
+        for _, user_id, topic_id, _, was_completed, _ in iter_archived_progress(topic_ids=topic_courses):
+            if was_completed and (user_id, topic_id) not in counted:
+                scores[(user_id, topic_courses[topic_id])] += 1
+                counted.add((user_id, topic_id))
+
+        buckets = Counter((course_id, score) for (_, course_id), score in scores.items())
+        with transaction.atomic():
+            CourseScore.objects.all().delete()
+            CourseScoreBucket.objects.all().delete()
+            CourseScore.objects.bulk_create(
+                [CourseScore(user_id=user_id, course_id=course_id, score=score)
+                 for (user_id, course_id), score in scores.items()],
+                batch_size=1000,
+            )
+            CourseScoreBucket.objects.bulk_create(
+                [CourseScoreBucket(course_id=course_id, score=score, users=users)
+                 for (course_id, score), users in buckets.items()],
+                batch_size=1000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(scores)} course scores in {len({course_id for _, course_id in scores})} courses"
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from videos.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount the denormalized topic/enrollment/course counters and fix any that drifted (run periodically)'
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counters()
+        for counter, rows in fixed.items():
+            self.stdout.write(f"{counter}: fixed {rows} rows")
+        self.stdout.write(self.style.SUCCESS('Counters reconciled'))
@@ -0,0 +1,39 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from videos.models import TopicRefreshRequest
+from videos.quota import BACKGROUND, QuotaDeferred, scheduler
+from videos.youtube import arefresh_course_topics
+
+
+class Command(BaseCommand):
+    help = 'Process topic refreshes queued from the admin, oldest first, within the YouTube quota'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=50, help='Maximum number of queued refreshes to process')
+
+    def handle(self, *args, **options):
+        done, pending = asyncio.run(self.process(options['limit']))
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {done} courses, {pending} still queued"))
+
+    async def process(self, limit):
+        queue = TopicRefreshRequest.objects.filter(processed_at__isnull=True).select_related('course')
+        done = 0
+        async for refresh in queue.order_by('created_at')[:limit]:
+            # Same as the refresh view: the current topics are only replaced once new ones are fetched
+            if not await sync_to_async(scheduler.has_budget)('search', BACKGROUND):
+                self.stdout.write('YouTube quota is running low, stopping')
+                break
+            try:
+                refresh.topics_created = await arefresh_course_topics(refresh.course, priority=BACKGROUND)
+            except QuotaDeferred as e:
+                self.stdout.write(f"Deferred {refresh.course.title}: {e}")
+                break
+            refresh.processed_at = timezone.now()
+            await refresh.asave()
+            done += 1
+            self.stdout.write(f"{refresh.course.title}: {refresh.topics_created} topics")
+        return done, await queue.acount()
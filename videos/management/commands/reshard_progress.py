@@ -0,0 +1,86 @@
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from AcademiX.sharding import shard_aliases, shard_for_user
+from videos.models import WatchEvent
+from videos.rollups import uncount_moved_events
+
+
+@contextmanager
+def preserve_auto_now(model):
+    """Keep stored auto_now/auto_now_add values when copying rows with bulk_create"""
+    flags = {
+        field: (field.auto_now, field.auto_now_add)
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    }
+    for field in flags:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in flags.items():
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Move sharded per-user rows to the shard their user hashes to under the current SHARD_DATABASES'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', action='append', dest='sources',
+            help='Database alias to drain misplaced rows from (repeatable, default: all shards)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would move')
+
+    def handle(self, *args, **options):
+        sources = options['sources'] or shard_aliases()
+
+        for label, user_attr in settings.SHARDED_MODELS.items():
+            model = apps.get_model(label)
+            for alias in sources:
+                moved = self.reshard(model, user_attr, alias, options['batch_size'], options['dry_run'])
+                verb = 'would move' if options['dry_run'] else 'moved'
+                self.stdout.write(f"{label} on {alias}: {verb} {moved} rows")
+
+        self.stdout.write(self.style.SUCCESS('Resharding complete'))
+
+    def reshard(self, model, user_attr, alias, batch_size, dry_run):
+        moved = 0
+        last_pk = 0
+        while True:
+            batch = list(model.objects.using(alias).filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                return moved
+            last_pk = batch[-1].pk
+
+            by_target = defaultdict(list)
+            for obj in batch:
+                target = shard_for_user(getattr(obj, user_attr))
+                if target != alias:
+                    by_target[target].append(obj)
+
+            for target, objs in by_target.items():
+                moved += len(objs)
+                if dry_run:
+                    continue
+
+                # Holds the source shard's rollup checkpoint until the rows are gone
+                with transaction.atomic():
+                    if model is WatchEvent:
+                        # The copies are rolled up again on the target shard
+                        uncount_moved_events(alias, objs)
+                    pks = [obj.pk for obj in objs]
+                    for obj in objs:
+                        # Primary keys are per shard, so copies get new ones
+                        obj.pk = None
+                        obj._state.adding = True
+                    with transaction.atomic(using=target), preserve_auto_now(model):
+                        model.objects.using(target).bulk_create(objs, ignore_conflicts=True)
+                    model.objects.using(alias).filter(pk__in=pks).delete()
@@ -0,0 +1,28 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from videos.rollups import ROLLUP_BATCH_SIZE, ROLLUP_SETTLE_TIME, rollup_watch_events
+
+
+class Command(BaseCommand):
+    help = 'Aggregate new watch events into the daily per-course and per-topic stats tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ROLLUP_BATCH_SIZE)
+        parser.add_argument(
+            '--settle-seconds', type=int, default=int(ROLLUP_SETTLE_TIME.total_seconds()),
+            help='Leave events younger than this for the next run, as they may not all be committed yet',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        processed = rollup_watch_events(
+            batch_size=options['batch_size'], settle=timedelta(seconds=options['settle_seconds'])
+        )
+        for alias, count in processed.items():
+            self.stdout.write(f"{alias}: {count} events")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {sum(processed.values())} events in {time.monotonic() - started:.2f}s"
+        ))
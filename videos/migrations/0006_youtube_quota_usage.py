@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0005_remove_field_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YouTubeQuotaUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('priority', models.CharField(choices=[('interactive', 'Interactive'), ('background', 'Background')], max_length=20)),
+                ('units', models.IntegerField(default=0)),
+                ('requests', models.IntegerField(default=0)),
+                ('deferred', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day', 'priority'],
+                'unique_together': {('day', 'priority')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0007_shard_video_progress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='videoprogress',
+            index=models.Index(fields=['watched_date'], name='videoprogress_watched_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-19 18:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0009_watch_events_and_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicRefreshRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('topics_created', models.IntegerField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='topic',
+            name='video_id',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['uploaded'], name='topic_uploaded_idx'),
+        ),
+        migrations.AddField(
+            model_name='topicrefreshrequest',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_requests', to='videos.course'),
+        ),
+        migrations.AddField(
+            model_name='topicrefreshrequest',
+            name='requested_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='topicrefreshrequest',
+            index=models.Index(fields=['processed_at', 'created_at'], name='refresh_pending_idx'),
+        ),
+    ]
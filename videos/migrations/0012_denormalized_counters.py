@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-19 18:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(model, fk):
+    rows = model.objects.filter(**{fk: OuterRef('pk')}).order_by().values(fk).annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(rows), Value(0))
+
+
+def backfill_counters(apps, schema_editor):
+    Field = apps.get_model('videos', 'Field')
+    Course = apps.get_model('videos', 'Course')
+    Topic = apps.get_model('videos', 'Topic')
+    UserCourse = apps.get_model('videos', 'UserCourse')
+    Course.objects.update(topic_count=_count(Topic, 'course'), enrolled_count=_count(UserCourse, 'course'))
+    Field.objects.update(course_count=_count(Course, 'field'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0011_streaks_and_course_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='topic_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='field',
+            name='course_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
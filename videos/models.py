@@ -1,9 +1,19 @@
-from django.db import models
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+from AcademiX.sharding import shard_aliases, shard_for_user
+from AcademiX.mixins import DirtyFieldsMixin
 
 class Field(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True) 
+    # Denormalized counters kept by videos.counters
+    course_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
@@ -14,19 +24,65 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     description = models.TextField(blank=True, null=True)  
     image = models.ImageField(upload_to='course_images/', blank=True, null=True)
+    # Denormalized counters kept by videos.counters
+    topic_count = models.PositiveIntegerField(default=0, editable=False)
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
 
 
     def __str__(self):
         return self.title
 
-class Topic(models.Model):
+def _delete_topic_progress(topic_ids):
+    for alias in shard_aliases():
+        VideoProgress.objects.using(alias).filter(topic_id__in=topic_ids).delete()
+
+class TopicQuerySet(models.QuerySet):
+    def delete(self):
+        """Delete in bulk, with the topics' progress, one counter update per course
+        and the course scores their completions earned.
+
+        Runs in a transaction on the topics' database and on every shard, so a
+        failure rolls all of it back (the commits themselves are not two-phase).
+        """
+        from .leaderboards import add_course_score
+
+        with ExitStack() as transactions:
+            for alias in dict.fromkeys([self.db, *shard_aliases()]):
+                transactions.enter_context(transaction.atomic(using=alias))
+
+            topic_courses = dict(self.values_list('pk', 'course_id'))
+            completions = Counter()
+            for alias in shard_aliases():
+                completed = VideoProgress.objects.using(alias).filter(topic_id__in=topic_courses, completed=True)
+                for user_id, topic_id in completed.values_list('user_id', 'topic_id'):
+                    completions[(user_id, topic_courses[topic_id])] += 1
+
+            deleted = super().delete()
+            _delete_topic_progress(list(topic_courses))
+            for course_id, n in Counter(topic_courses.values()).items():
+                Course.objects.filter(pk=course_id).update(topic_count=F('topic_count') - n)
+            for (user_id, course_id), n in completions.items():
+                add_course_score(user_id, course_id, -n)
+        return deleted
+
+class Topic(DirtyFieldsMixin, models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='topics', default=1)
     name = models.CharField(max_length=255)
     url = models.URLField()
     is_recommended = models.BooleanField(default=False)
     uploaded = models.DateTimeField(auto_now_add=True)
     description = models.TextField(blank=True, null=True)  # Added description field
-    video_id = models.CharField(max_length=20, blank=True, null=True)  # Store YouTube video ID
+    video_id = models.CharField(max_length=20, blank=True, null=True, db_index=True)  # Store YouTube video ID
+    
+    # Deletes adjust Course.topic_count and drop progress here rather than
+    # in post_delete receivers, which would make Django delete row by row
+    objects = TopicQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Backs the admin date hierarchy
+            models.Index(fields=['uploaded'], name='topic_uploaded_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         # Extract video_id from URL if not provided
@@ -34,6 +90,9 @@ class Topic(models.Model):
             self.video_id = self.url.split('youtube.com/embed/')[1]
         super().save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        return Topic.objects.filter(pk=self.pk).delete()
+
     def __str__(self):
         return f"{self.course.title} - {self.name}"
 
@@ -47,16 +106,168 @@ class UserCourse(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.course.title}"
 
-class VideoProgress(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    topic = models.ForeignKey(Topic, on_delete=models.CASCADE)
+class TopicRefreshRequest(models.Model):
+    # Queued by the admin "refresh topics" action, processed by `manage.py refresh_topics`
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='refresh_requests')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    topics_created = models.IntegerField(blank=True, null=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['processed_at', 'created_at'], name='refresh_pending_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.course_id} requested {self.created_at:%Y-%m-%d %H:%M}"
+
+class ShardedQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """This user's rows, read from the shard that holds them"""
+        return self.using(shard_for_user(user)).filter(user=user)
+
+class VideoProgress(DirtyFieldsMixin, models.Model):
+    # Sharded by user (AcademiX.sharding): no DB-level foreign keys, and
+    # deletes of users/courses are cascaded by the receivers below (topics
+    # by TopicQuerySet.delete)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False)
+    topic = models.ForeignKey(Topic, on_delete=models.DO_NOTHING, db_constraint=False)
     watched_date = models.DateTimeField(auto_now=True)
     completed = models.BooleanField(default=False)
     watch_duration = models.IntegerField(default=0)  # Store seconds watched
     
+    objects = ShardedQuerySet.as_manager()
+    
     class Meta:
         unique_together = ('user', 'topic')
         ordering = ['-watched_date']
+        indexes = [
+            # Lets archive_progress find cold rows without a full scan
+            models.Index(fields=['watched_date'], name='videoprogress_watched_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.topic.name}"
+
+@receiver(pre_delete, sender=Course)
+def delete_course_progress(sender, instance, **kwargs):
+    # The course's topics go in a cascade, which bypasses TopicQuerySet.delete
+    _delete_topic_progress(list(instance.topics.values_list('pk', flat=True)))
+
+class WatchEvent(models.Model):
+    # Append-only log written by track_video_progress and aggregated into the
+    # daily stats tables by `manage.py rollup_watch_events`. Sharded by user
+    # like VideoProgress; events outlive topic refreshes, so no FK cascades.
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False)
+    topic = models.ForeignKey(Topic, on_delete=models.DO_NOTHING, db_constraint=False)
+    course = models.ForeignKey(Course, on_delete=models.DO_NOTHING, db_constraint=False)
+    seconds = models.IntegerField(default=0)  # Newly watched seconds since the previous report
+    completed = models.BooleanField(default=False)  # This report completed the video
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = ShardedQuerySet.as_manager()
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.topic_id} +{self.seconds}s"
+
+@receiver(post_delete, sender=User)
+def delete_user_progress(sender, instance, **kwargs):
+    VideoProgress.objects.for_user(instance).delete()
+    WatchEvent.objects.for_user(instance).delete()
+
+class DailyCourseStat(models.Model):
+    day = models.DateField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    seconds = models.BigIntegerField(default=0)
+    events = models.IntegerField(default=0)
+    completions = models.IntegerField(default=0)
     
+    class Meta:
+        unique_together = ('day', 'course')
+    
+    def __str__(self):
+        return f"{self.day} {self.course_id}: {self.seconds}s"
+
+class DailyTopicStat(models.Model):
+    day = models.DateField()
+    # Topics are replaced on refresh; their stats are kept
+    topic = models.ForeignKey(Topic, on_delete=models.DO_NOTHING, db_constraint=False)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_topic_stats')
+    seconds = models.BigIntegerField(default=0)
+    events = models.IntegerField(default=0)
+    completions = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('day', 'topic')
+    
+    def __str__(self):
+        return f"{self.day} {self.topic_id}: {self.seconds}s"
+
+class RollupCheckpoint(models.Model):
+    name = models.CharField(max_length=100, unique=True)  # e.g. "watch_events:shard_0"
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
+
+class LearningStreak(models.Model):
+    # Maintained by videos.leaderboards.record_activity on each progress report
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='streak')
+    current_days = models.IntegerField(default=0)
+    longest_days = models.IntegerField(default=0)
+    last_active = models.DateField(blank=True, null=True)
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.current_days} days"
+
+class CourseScore(models.Model):
+    # Completed topics per user and course, kept sorted by the index below
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='scores')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    score = models.IntegerField(default=0)
+    reached_at = models.DateTimeField(auto_now=True)  # Breaks ties: first to reach the score ranks higher
+    
+    class Meta:
+        unique_together = ('course', 'user')
+        indexes = [
+            models.Index(fields=['course', '-score', 'reached_at'], name='coursescore_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.course_id} {self.user_id}: {self.score}"
+
+class CourseScoreBucket(models.Model):
+    # Number of users per (course, score): ranks are sums over the few distinct
+    # scores above a user's instead of counts over every user ahead
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='score_buckets')
+    score = models.IntegerField()
+    users = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('course', 'score')
+    
+    def __str__(self):
+        return f"{self.course_id} score {self.score}: {self.users} users"
+
+class YouTubeQuotaUsage(models.Model):
+    INTERACTIVE = 'interactive'
+    BACKGROUND = 'background'
+    PRIORITY_CHOICES = [
+        (INTERACTIVE, 'Interactive'),
+        (BACKGROUND, 'Background'),
+    ]
+
+    day = models.DateField()  # Quota day (Pacific time, when YouTube resets it)
+    priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES)
+    units = models.IntegerField(default=0)
+    requests = models.IntegerField(default=0)
+    deferred = models.IntegerField(default=0)  # Calls refused for lack of budget
+
+    class Meta:
+        unique_together = ('day', 'priority')
+        ordering = ['-day', 'priority']
+
     def __str__(self):
-        return f"{self.user.username} - {self.topic.name}"
\ No newline at end of file
+        return f"{self.day} {self.priority}: {self.units} units"
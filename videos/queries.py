@@ -0,0 +1,72 @@
+"""Querysets shared by the HTML views and the JSON API (videos.api)"""
+from django.db.models import Prefetch
+
+from .leaderboards import current_streak
+from .models import Course, Field, LearningStreak, Topic, UserCourse, VideoProgress
+
+
+def catalog_courses():
+    """Courses with their field, in a stable order for cursor pagination"""
+    return Course.objects.select_related('field').order_by('id')
+
+
+def catalog_fields():
+    return Field.objects.order_by('name')
+
+
+def topics_with_progress(user, course):
+    """Topics of a course with the user's VideoProgress (or None) as topic.progress"""
+    topics = Topic.objects.filter(course=course).prefetch_related(
+        Prefetch(
+            'videoprogress_set',
+            queryset=VideoProgress.objects.for_user(user),
+            to_attr='user_progress'
+        )
+    ).order_by('uploaded')
+    
+    for topic in topics:
+        topic.progress = topic.user_progress[0] if topic.user_progress else None
+    return topics
+
+
+def dashboard_summary(user):
+    """Everything the dashboard shows for a user"""
+    user_courses = UserCourse.objects.filter(user=user).select_related('course')
+    course_count = user_courses.count()
+    
+    # Get recently watched videos
+    progress = VideoProgress.objects.for_user(user)
+    recent_videos = progress.order_by('-watched_date')[:5]
+    
+    # Get recommended videos (not watched yet); progress may live on another
+    # shard, so the watched ids are fetched rather than used as a subquery
+    watched_topics = list(progress.values_list('topic_id', flat=True))
+    user_course_ids = user_courses.values_list('course_id', flat=True)
+    recommended_videos = Topic.objects.filter(
+        course_id__in=user_course_ids,
+        is_recommended=True
+    ).exclude(id__in=watched_topics)[:5]
+    
+    # Get stats
+    videos_watched = len(watched_topics)
+    videos_completed = progress.filter(completed=True).count()
+    
+    # Calculate completion percentage
+    if videos_watched > 0:
+        completion_percentage = (videos_completed / videos_watched) * 100
+    else:
+        completion_percentage = 0
+    
+    streak = LearningStreak.objects.filter(user=user).first()
+    
+    return {
+        'streak_days': current_streak(streak),
+        'longest_streak': streak.longest_days if streak else 0,
+        'course_count': course_count,
+        'recent_videos': recent_videos,
+        'recommended_videos': recommended_videos,
+        'videos_watched': videos_watched,
+        'videos_completed': videos_completed,
+        'completion_percentage': completion_percentage,
+        'user_courses': user_courses,
+    }
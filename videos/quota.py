@@ -0,0 +1,218 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import F, Subquery, Sum, Value
+from django.db.models.lookups import LessThanOrEqual
+
+from .models import YouTubeQuotaUsage
+
+INTERACTIVE = YouTubeQuotaUsage.INTERACTIVE
+BACKGROUND = YouTubeQuotaUsage.BACKGROUND
+
+# Quota units charged by the YouTube Data API per call
+QUOTA_COSTS = {
+    'search': 100,
+    'videos': 1,
+    'playlistItems': 1,
+}
+
+# The YouTube quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+
+class QuotaDeferred(Exception):
+    """Raised when a YouTube call is refused because the quota budget is too low"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket; tokens may be taken ahead of time (negative balance)"""
+
+    def __init__(self, capacity, refill_rate):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def try_take(self, amount):
+        """Take amount tokens if the bucket holds them; returns whether it did"""
+        with self.lock:
+            self._refill()
+            if self.tokens < amount:
+                return False
+            self.tokens -= amount
+            return True
+
+    def take(self, amount):
+        """Take amount tokens without waiting, even into a negative balance"""
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+
+    def give_back(self, amount):
+        """Return tokens taken for a call that was not made"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def set_rate(self, refill_rate):
+        with self.lock:
+            # Tokens earned so far accrue at the old rate
+            self._refill()
+            self.refill_rate = refill_rate
+
+    def available(self):
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+
+class QuotaScheduler:
+    """Budget YouTube API calls against the daily quota.
+
+    Daily spend is recorded per priority in YouTubeQuotaUsage (which also backs
+    the quota dashboards) and is checked and charged in one locked, conditional
+    UPDATE, so workers can't overspend together. Interactive work runs as
+    long as the day's quota lasts. Background work may not dip into the last
+    `reserve` units of the day and is paced by a per-process token bucket
+    that refills at what is left above the reserve spread over the rest of
+    the quota day; it never waits.
+    """
+
+    def __init__(self):
+        self.daily_quota = getattr(settings, 'YOUTUBE_DAILY_QUOTA', 10000)
+        self.reserve = getattr(settings, 'YOUTUBE_QUOTA_RESERVE', 2000)
+        self.bucket = TokenBucket(
+            capacity=getattr(settings, 'YOUTUBE_QUOTA_BURST', 2000),
+            refill_rate=self.daily_quota / 86400,
+        )
+        self._rows_day = None
+
+    def quota_day(self):
+        return datetime.now(QUOTA_TIMEZONE).date()
+
+    def _seconds_to_reset(self):
+        now = datetime.now(QUOTA_TIMEZONE)
+        reset = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), QUOTA_TIMEZONE)
+        return max((reset - now).total_seconds(), 1)
+
+    def _exhausted_key(self, day):
+        return f"youtube:quota:exhausted:{day.isoformat()}"
+
+    def spent_today(self):
+        spent = YouTubeQuotaUsage.objects.filter(day=self.quota_day()).aggregate(total=Sum('units'))['total']
+        return spent or 0
+
+    def remaining_today(self):
+        day = self.quota_day()
+        if cache.get(self._exhausted_key(day)):
+            return 0
+        return max(self.daily_quota - self.spent_today(), 0)
+
+    def _floor(self, priority):
+        return 0 if priority == INTERACTIVE else self.reserve
+
+    def _pace_background(self, remaining):
+        # Spread what background work may still spend over the rest of the day
+        self.bucket.set_rate(max(remaining - self.reserve, 0) / self._seconds_to_reset())
+
+    def has_budget(self, endpoint, priority=INTERACTIVE):
+        """Check (without spending) whether a call would currently be allowed"""
+        cost = QUOTA_COSTS[endpoint]
+        remaining = self.remaining_today()
+        if remaining - cost < self._floor(priority):
+            return False
+        if priority == INTERACTIVE:
+            return True
+        self._pace_background(remaining)
+        return self.bucket.available() >= cost
+
+    def _usage_rows(self, day):
+        """The day's usage rows, one per priority, created once per day"""
+        if self._rows_day != day:
+            YouTubeQuotaUsage.objects.bulk_create(
+                [YouTubeQuotaUsage(day=day, priority=priority) for priority in (INTERACTIVE, BACKGROUND)],
+                ignore_conflicts=True,
+            )
+            self._rows_day = day
+        return YouTubeQuotaUsage.objects.filter(day=day)
+
+    def _record_deferred(self, day, priority):
+        self._usage_rows(day).filter(priority=priority).update(deferred=F('deferred') + 1)
+
+    def _spend(self, day, priority, cost):
+        """Charge cost if the day's total stays within the limit for priority; returns whether it did"""
+        rows = self._usage_rows(day)
+        spent = Subquery(rows.order_by().values('day').annotate(total=Sum('units')).values('total'))
+        limit = self.daily_quota - self._floor(priority) - cost
+        charge = rows.filter(priority=priority).filter(LessThanOrEqual(spent, Value(limit)))
+        using = router.db_for_write(YouTubeQuotaUsage)
+        if not connections[using].features.has_select_for_update:
+            # SQLite serializes writers, so the conditional UPDATE is atomic on its own
+            return bool(charge.update(units=F('units') + cost, requests=F('requests') + 1))
+        with transaction.atomic(using=using):
+            # Lock the day's rows so concurrent charges see each other's spend
+            list(rows.select_for_update().values_list('pk', flat=True))
+            return bool(charge.update(units=F('units') + cost, requests=F('requests') + 1))
+
+    def acquire(self, endpoint, priority=INTERACTIVE):
+        """Spend quota for one call, which may then be made right away.
+
+        Raises QuotaDeferred if the call should not be made now.
+        """
+        cost = QUOTA_COSTS[endpoint]
+        day = self.quota_day()
+        if cache.get(self._exhausted_key(day)):
+            self._record_deferred(day, priority)
+            raise QuotaDeferred(f"YouTube quota exhausted for {endpoint} ({priority})")
+
+        if priority != INTERACTIVE:
+            self._pace_background(self.remaining_today())
+            if not self.bucket.try_take(cost):
+                self._record_deferred(day, priority)
+                raise QuotaDeferred(f"YouTube request rate limited for {endpoint} ({priority})")
+
+        if not self._spend(day, priority, cost):
+            if priority != INTERACTIVE:
+                self.bucket.give_back(cost)
+            self._record_deferred(day, priority)
+            raise QuotaDeferred(f"YouTube quota too low for {endpoint} ({priority})")
+
+        if priority == INTERACTIVE:
+            # Interactive calls don't wait, but leave less for background pacing
+            self.bucket.take(cost)
+
+    def mark_exhausted(self):
+        """Stop spending until the quota resets (YouTube returned quotaExceeded)"""
+        cache.set(self._exhausted_key(self.quota_day()), True, int(self._seconds_to_reset()) + 1)
+
+    def status(self, days=30):
+        """Quota burn summary for dashboards"""
+        today = self.quota_day()
+        history = YouTubeQuotaUsage.objects.filter(
+            day__gt=today - timedelta(days=days)
+        ).order_by('-day', 'priority').values('day', 'priority', 'units', 'requests', 'deferred')
+
+        spent = self.spent_today()
+        return {
+            'day': today.isoformat(),
+            'daily_quota': self.daily_quota,
+            'spent': spent,
+            'remaining': self.remaining_today(),
+            'reserve': self.reserve,
+            'bucket_tokens': round(self.bucket.available(), 1),
+            'history': [dict(row, day=row['day'].isoformat()) for row in history],
+        }
+
+
+scheduler = QuotaScheduler()
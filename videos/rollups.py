@@ -0,0 +1,150 @@
+from datetime import date, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from AcademiX.sharding import shard_aliases
+from .models import DailyCourseStat, DailyTopicStat, RollupCheckpoint, WatchEvent
+
+ROLLUP_BATCH_SIZE = 50000
+# How long a watch event may take to commit; newer ones wait for the next run
+ROLLUP_SETTLE_TIME = timedelta(minutes=5)
+
+
+def _aggregate(keys, seconds, completed):
+    """Group rows by key columns; returns (unique keys, seconds, events, completions)"""
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    groups = len(unique_keys)
+    return (
+        unique_keys,
+        np.bincount(inverse, weights=seconds, minlength=groups).astype(np.int64),
+        np.bincount(inverse, minlength=groups),
+        np.bincount(inverse, weights=completed, minlength=groups).astype(np.int64),
+    )
+
+
+def _merge(model, key_fields, unique_keys, seconds, events, completions, attr_fields=()):
+    """Add aggregated totals to the stats rows with these keys, creating missing ones.
+
+    unique_keys columns are key_fields (day as an ordinal first) followed by
+    attr_fields, which are only used to fill in newly created rows.
+    """
+    width = len(key_fields)
+    totals = {}
+    attrs = {}
+    for key, s, e, c in zip(unique_keys.tolist(), seconds, events, completions):
+        totals[tuple(key[:width])] = (int(s), int(e), int(c))
+        attrs[tuple(key[:width])] = dict(zip(attr_fields, key[width:]))
+
+    lookup = {f"{field}__in": {key[i] for key in totals} for i, field in enumerate(key_fields)}
+    lookup['day__in'] = {date.fromordinal(day) for day in lookup['day__in']}
+    existing = {
+        tuple(getattr(row, field) for field in key_fields): row
+        for row in model.objects.select_for_update().filter(**lookup)
+    }
+
+    to_create = []
+    to_update = []
+    for key, (s, e, c) in totals.items():
+        row_key = (date.fromordinal(key[0]),) + key[1:]
+        row = existing.get(row_key)
+        if row is None:
+            values = dict(zip(key_fields, row_key), seconds=s, events=e, completions=c)
+            values.update(attrs[key])
+            to_create.append(model(**values))
+        else:
+            row.seconds += s
+            row.events += e
+            row.completions += c
+            to_update.append(row)
+
+    model.objects.bulk_update(to_update, ['seconds', 'events', 'completions'], batch_size=1000)
+    model.objects.bulk_create(to_create, batch_size=1000)
+
+
+def _totals(rows):
+    """Per-course and per-topic daily totals of (created_at, course_id, topic_id, seconds, completed) rows"""
+    created_at, course_ids, topic_ids, seconds, completed = zip(*rows)
+    days = np.fromiter((timezone.localdate(moment).toordinal() for moment in created_at), dtype=np.int64, count=len(rows))
+    course_ids = np.asarray(course_ids, dtype=np.int64)
+    topic_ids = np.asarray(topic_ids, dtype=np.int64)
+    seconds = np.asarray(seconds, dtype=np.int64)
+    completed = np.asarray(completed, dtype=np.int64)
+
+    course_totals = _aggregate(np.column_stack((days, course_ids)), seconds, completed)
+    topic_totals = _aggregate(np.column_stack((days, topic_ids, course_ids)), seconds, completed)
+    return course_totals, topic_totals
+
+
+def _checkpoint(alias):
+    """The shard's checkpoint, locked until the transaction ends"""
+    checkpoint, _ = RollupCheckpoint.objects.get_or_create(name=f"watch_events:{alias}")
+    return RollupCheckpoint.objects.select_for_update().get(pk=checkpoint.pk)
+
+
+def rollup_batch(alias, batch_size, settled_before):
+    """Aggregate the next batch of events from one shard; returns events processed.
+
+    Ids are handed out at insert time but become visible at commit, so a
+    later id can be committed before an earlier one. Only events created
+    before settled_before are taken, and the batch stops at the first newer
+    one, so the checkpoint never passes an id that may still be in flight.
+    """
+    # Totals and the checkpoint commit together, so each event is counted once
+    with transaction.atomic():
+        checkpoint = _checkpoint(alias)
+        events = WatchEvent.objects.using(alias).filter(id__gt=checkpoint.last_id)
+        unsettled = events.filter(created_at__gte=settled_before).order_by('id').values_list('id', flat=True).first()
+        if unsettled is not None:
+            events = events.filter(id__lt=unsettled)
+        rows = list(events.order_by('id').values_list(
+            'id', 'created_at', 'course_id', 'topic_id', 'seconds', 'completed'
+        )[:batch_size])
+        if not rows:
+            return 0
+
+        course_totals, topic_totals = _totals([row[1:] for row in rows])
+        _merge(DailyCourseStat, ('day', 'course_id'), *course_totals)
+        _merge(DailyTopicStat, ('day', 'topic_id'), *topic_totals, attr_fields=('course_id',))
+        checkpoint.last_id = rows[-1][0]
+        checkpoint.save()
+
+    return len(rows)
+
+
+def rollup_watch_events(batch_size=ROLLUP_BATCH_SIZE, settle=ROLLUP_SETTLE_TIME):
+    """Aggregate the settled watch events on every shard; returns {alias: events processed}"""
+    settled_before = timezone.now() - settle
+    processed = {}
+    for alias in shard_aliases():
+        processed[alias] = 0
+        while True:
+            count = rollup_batch(alias, batch_size, settled_before)
+            if not count:
+                break
+            processed[alias] += count
+    return processed
+
+
+def uncount_moved_events(alias, events):
+    """Take events leaving a shard back out of the stats if it already rolled them up.
+
+    Their copies get new ids on the target shard and are counted there again.
+    Call inside a transaction that also deletes them from alias, so the
+    shard's rollup (waiting on the checkpoint lock) can't count them twice.
+    """
+    checkpoint = _checkpoint(alias)
+    counted = [
+        (event.created_at, event.course_id, event.topic_id, event.seconds, event.completed)
+        for event in events if event.pk <= checkpoint.last_id
+    ]
+    if not counted:
+        return 0
+
+    (course_keys, *course_columns), (topic_keys, *topic_columns) = _totals(counted)
+    _merge(DailyCourseStat, ('day', 'course_id'), course_keys, *(-column for column in course_columns))
+    _merge(DailyTopicStat, ('day', 'topic_id'), topic_keys, *(-column for column in topic_columns),
+           attr_fields=('course_id',))
+    return len(counted)
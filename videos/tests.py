@@ -1,3 +1,315 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .enrollment import bulk_enroll, is_enrolled
+from .enrollment_index import EnrollmentIndex, _bitmap, enrollment_index
+from .leaderboards import course_rank
+from .management.commands.reshard_progress import preserve_auto_now
+from .models import (
+    Course, CourseScore, CourseScoreBucket, DailyCourseStat, DailyTopicStat, Field, RollupCheckpoint, Topic,
+    TopicRefreshRequest, UserCourse, VideoProgress, WatchEvent, YouTubeQuotaUsage,
+)
+from .quota import BACKGROUND, INTERACTIVE, QuotaDeferred, QuotaScheduler
+from .rollups import rollup_watch_events, uncount_moved_events
+from .views import _record_progress
+
+
+def make_course(title='Course', topics=0):
+    field = Field.objects.create(name='Field')
+    course = Course.objects.create(title=title, field=field)
+    for i in range(topics):
+        Topic.objects.create(course=course, name=f"Topic {i}", url=f"https://www.youtube.com/embed/video{i}")
+    return course
+
+
+def use_temporary_index(test):
+    """Point the enrollment bitmaps at a fresh directory for the test"""
+    index_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(index_dir.cleanup)
+    test.enterContext(override_settings(ENROLLMENT_INDEX_DIR=index_dir.name))
+    enrollment_index.bitmaps.clear()
+
+
+class QuotaSchedulerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.scheduler = QuotaScheduler()
+        self.scheduler.daily_quota = 10000
+        self.scheduler.reserve = 2000
+
+    def usage(self, priority):
+        return YouTubeQuotaUsage.objects.get(day=self.scheduler.quota_day(), priority=priority)
+
+    def test_charge_is_recorded(self):
+        self.assertIsNone(self.scheduler.acquire('search'))
+        self.scheduler.acquire('videos')
+        usage = self.usage(INTERACTIVE)
+        self.assertEqual((usage.units, usage.requests, usage.deferred), (101, 2, 0))
+
+    def test_charge_refused_past_the_daily_quota(self):
+        self.scheduler.daily_quota = 150
+        self.scheduler.acquire('search')
+        with self.assertRaises(QuotaDeferred):
+            self.scheduler.acquire('search')
+        usage = self.usage(INTERACTIVE)
+        self.assertEqual((usage.units, usage.requests, usage.deferred), (100, 1, 1))
+
+    def test_background_keeps_out_of_the_reserve(self):
+        self.scheduler.daily_quota = 2150
+        self.scheduler.acquire('search', BACKGROUND)
+        with self.assertRaises(QuotaDeferred):
+            self.scheduler.acquire('search', BACKGROUND)
+        # Interactive work may still spend the reserve
+        self.scheduler.acquire('search', INTERACTIVE)
+        self.assertEqual(self.scheduler.spent_today(), 200)
+
+    def test_refused_background_charge_refunds_its_tokens(self):
+        self.scheduler.daily_quota = 2150
+        self.scheduler.acquire('search', BACKGROUND)
+        tokens = self.scheduler.bucket.available()
+        with self.assertRaises(QuotaDeferred):
+            self.scheduler.acquire('search', BACKGROUND)
+        self.assertAlmostEqual(self.scheduler.bucket.available(), tokens, delta=1)
+
+    def test_background_rate_limited_by_the_bucket(self):
+        self.scheduler.bucket.tokens = self.scheduler.bucket.capacity = 150
+        self.scheduler.acquire('search', BACKGROUND)
+        with self.assertRaises(QuotaDeferred):
+            self.scheduler.acquire('search', BACKGROUND)
+        self.assertEqual(self.usage(BACKGROUND).deferred, 1)
+
+    def test_exhausted_quota_defers_everything(self):
+        self.scheduler.mark_exhausted()
+        with self.assertRaises(QuotaDeferred):
+            self.scheduler.acquire('videos')
+        self.assertEqual(self.scheduler.remaining_today(), 0)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner')
+        self.course = make_course(topics=1)
+        self.topic = self.course.topics.get()
+
+    def event(self, seconds, age, completed=False):
+        event = WatchEvent.objects.create(
+            user=self.user, topic=self.topic, course=self.course, seconds=seconds, completed=completed
+        )
+        WatchEvent.objects.filter(pk=event.pk).update(created_at=timezone.now() - age)
+        return WatchEvent.objects.get(pk=event.pk)
+
+    def seconds_by_day(self):
+        return dict(DailyCourseStat.objects.values_list('day', 'seconds'))
+
+    def test_rolls_up_settled_events(self):
+        old = self.event(60, timedelta(days=2))
+        self.event(30, timedelta(days=2), completed=True)
+        self.assertEqual(rollup_watch_events(), {'default': 2})
+        stat = DailyCourseStat.objects.get()
+        self.assertEqual((stat.day, stat.seconds, stat.events, stat.completions),
+                         (timezone.localdate(old.created_at), 90, 2, 1))
+        self.assertEqual(DailyTopicStat.objects.get().seconds, 90)
+        # Each event is counted once
+        self.assertEqual(rollup_watch_events(), {'default': 0})
+        self.assertEqual(DailyCourseStat.objects.get().seconds, 90)
+
+    def test_watermark_stops_at_unsettled_events(self):
+        first = self.event(60, timedelta(hours=1))
+        self.event(30, timedelta(seconds=0))
+        # A lower id can commit later than a higher one, so nothing past an
+        # unsettled event is taken even if it is old enough itself
+        self.event(10, timedelta(hours=1))
+        self.assertEqual(rollup_watch_events(), {'default': 1})
+        self.assertEqual(RollupCheckpoint.objects.get().last_id, first.pk)
+
+        self.assertEqual(rollup_watch_events(settle=timedelta(0)), {'default': 2})
+        self.assertEqual(sum(self.seconds_by_day().values()), 100)
+
+    def test_moved_events_are_uncounted_and_keep_their_day(self):
+        event = self.event(60, timedelta(days=3))
+        rollup_watch_events()
+        day = timezone.localdate(event.created_at)
+        self.assertEqual(self.seconds_by_day(), {day: 60})
+
+        # reshard_progress: uncount on the source, copy keeping created_at
+        self.assertEqual(uncount_moved_events('default', [event]), 1)
+        self.assertEqual(self.seconds_by_day(), {day: 0})
+        event.pk = None
+        event._state.adding = True
+        with preserve_auto_now(WatchEvent):
+            WatchEvent.objects.bulk_create([event])
+        WatchEvent.objects.filter(pk__lte=RollupCheckpoint.objects.get().last_id).delete()
+
+        rollup_watch_events()
+        self.assertEqual(self.seconds_by_day(), {day: 60})
+
+    def test_events_not_yet_rolled_up_are_left_alone(self):
+        event = self.event(60, timedelta(days=3))
+        self.assertEqual(uncount_moved_events('default', [event]), 0)
+        self.assertFalse(DailyCourseStat.objects.exists())
+
+
+class BulkEnrollTests(TestCase):
+    def setUp(self):
+        use_temporary_index(self)
+        self.users = [User.objects.create_user(f"learner{i}") for i in range(3)]
+        self.course = make_course('With topics', topics=1)
+        self.empty_course = make_course('Without topics')
+
+    def test_counts_only_inserted_pairs(self):
+        enrolled = self.users[0]
+        UserCourse.objects.create(user=enrolled, course=self.course)
+        pairs = [(user.pk, self.course.pk) for user in self.users] + [(self.users[1].pk, str(self.course.pk))]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = bulk_enroll(pairs, chunk_size=2)
+
+        self.assertEqual(sorted(result['created']), [(user.pk, self.course.pk) for user in self.users[1:]])
+        self.assertEqual(result['already_enrolled'], 1)
+        self.assertEqual(UserCourse.objects.filter(course=self.course).count(), 3)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 3)
+        self.assertEqual(enrollment_index.count(self.course.pk), 3)
+
+    def test_rerun_creates_nothing(self):
+        pairs = [(user.pk, self.course.pk) for user in self.users]
+        bulk_enroll(pairs)
+        result = bulk_enroll(pairs)
+        self.assertEqual((result['created'], result['already_enrolled']), ([], 3))
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 3)
+
+    def test_reports_unknown_ids_and_queues_topic_ingestion(self):
+        user = self.users[0]
+        result = bulk_enroll([(user.pk, self.empty_course.pk), (999999, self.course.pk), (user.pk, 999999)])
+        self.assertEqual(result['created'], [(user.pk, self.empty_course.pk)])
+        self.assertEqual((result['unknown_users'], result['unknown_courses']), ([999999], [999999]))
+        self.assertEqual(result['queued_topic_refreshes'], 1)
+        self.assertTrue(TopicRefreshRequest.objects.filter(course=self.empty_course).exists())
+
+
+class EnrollmentIndexTests(TestCase):
+    def setUp(self):
+        use_temporary_index(self)
+        self.users = [User.objects.create_user(f"learner{i}") for i in range(3)]
+        self.course = make_course(topics=1)
+        UserCourse.objects.create(user=self.users[0], course=self.course)
+
+    def test_missing_file_is_built_from_the_table(self):
+        index = EnrollmentIndex()
+        self.assertEqual(index.count(self.course.pk), 1)
+        self.assertTrue(index.path(self.course.pk).exists())
+
+    def test_file_replaced_elsewhere_is_reloaded(self):
+        index, other_node = EnrollmentIndex(), EnrollmentIndex()
+        self.assertEqual(index.count(self.course.pk), 1)
+        other_node.update(self.course.pk, added=[user.pk for user in self.users])
+
+        # Checked at most every RELOAD_INTERVAL seconds
+        self.assertEqual(index.count(self.course.pk), 1)
+        with mock.patch('videos.enrollment_index.RELOAD_INTERVAL', 0):
+            self.assertEqual(index.count(self.course.pk), 3)
+
+    def test_stale_bitmap_grants_no_access(self):
+        # The file says everyone is enrolled, the table says only users[0]
+        enrollment_index.rebuild([self.course.pk])
+        with enrollment_index._locked(self.course.pk):
+            enrollment_index._save(self.course.pk, _bitmap([user.pk for user in self.users]))
+        self.assertEqual(enrollment_index.count(self.course.pk), 3)
+
+        self.assertTrue(is_enrolled(self.users[0].pk, self.course.pk))
+        self.assertFalse(is_enrolled(self.users[1].pk, self.course.pk))
+        self.client.force_login(self.users[1])
+        response = self.client.get(f"/api/v1/courses/{self.course.pk}/topics/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_bitmap_missing_an_enrollment_still_grants_access(self):
+        enrollment_index.rebuild([self.course.pk])
+        UserCourse.objects.create(user=self.users[1], course=self.course)  # on_commit never runs here
+        self.assertTrue(is_enrolled(self.users[1].pk, self.course.pk))
+
+
+class TopicDeletionTests(TestCase):
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.enterContext(override_settings(PROGRESS_ARCHIVE_DIR=archive_dir.name))
+        self.course = make_course('First', topics=3)
+        self.other = make_course('Second', topics=2)
+        self.learner, self.runner_up = User.objects.create_user('learner'), User.objects.create_user('runner_up')
+        topics = list(self.course.topics.order_by('pk'))
+        for topic in topics:
+            _record_progress(self.learner, topic, 300, True)
+        _record_progress(self.runner_up, topics[0], 300, True)
+        _record_progress(self.runner_up, topics[1], 300, True)
+        _record_progress(self.learner, self.other.topics.first(), 300, True)
+        self.topics = topics
+
+    def topic_count(self, course):
+        course.refresh_from_db()
+        return course.topic_count
+
+    def score(self, user, course):
+        return CourseScore.objects.get(user=user, course=course).score
+
+    def test_counters_follow_topic_creation(self):
+        self.assertEqual((self.topic_count(self.course), self.topic_count(self.other)), (3, 2))
+
+    def test_bulk_delete_adjusts_each_course_once(self):
+        deleted = Topic.objects.filter(pk__in=[self.topics[0].pk, self.topics[1].pk, self.other.topics.first().pk])
+        deleted.delete()
+        self.assertEqual((self.topic_count(self.course), self.topic_count(self.other)), (1, 1))
+        self.assertEqual(VideoProgress.objects.filter(user=self.learner).count(), 1)
+
+    def test_delete_reverses_scores_and_ranks(self):
+        self.assertEqual(course_rank(self.runner_up, self.course.pk), (2, 2))
+        self.topics[2].delete()
+        self.assertEqual(self.topic_count(self.course), 2)
+        self.assertEqual((self.score(self.learner, self.course), self.score(self.runner_up, self.course)), (2, 2))
+        self.assertEqual(self.score(self.learner, self.other), 1)
+
+        Topic.objects.filter(pk__in=[self.topics[0].pk, self.topics[1].pk]).delete()
+        self.assertEqual((self.score(self.learner, self.course), self.score(self.runner_up, self.course)), (0, 0))
+        self.assertEqual(course_rank(self.learner, self.course.pk), (None, 0))
+        self.assertFalse(CourseScoreBucket.objects.filter(users__lt=0).exists())
+
+
+@override_settings(RATE_LIMITS={'track_progress': (60, 2)})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user, self.other = User.objects.create_user('learner'), User.objects.create_user('other')
+        self.client.force_login(self.user)
+
+    def track(self, client=None):
+        # An unknown topic answers 404 after the limiter has taken its token
+        return (client or self.client).post(
+            reverse('track_progress'), {'topic_id': 0, 'duration': 10}, content_type='application/json'
+        )
+
+    def test_burst_then_429(self):
+        with mock.patch('AcademiX.ratelimit.time.time', return_value=1000.0):
+            self.assertEqual([self.track().status_code for _ in range(2)], [404, 404])
+            response = self.track()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response.json()['retry_after'], 1)
+
+    def test_tokens_refill_per_user(self):
+        with mock.patch('AcademiX.ratelimit.time.time', return_value=1000.0):
+            for _ in range(3):
+                self.track()
+            other_client = self.client_class()
+            other_client.force_login(self.other)
+            self.assertEqual(self.track(other_client).status_code, 404)
+        with mock.patch('AcademiX.ratelimit.time.time', return_value=1001.0):
+            self.assertEqual(self.track().status_code, 404)
+            self.assertEqual(self.track().status_code, 429)
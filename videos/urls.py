@@ -9,4 +9,8 @@ urlpatterns = [
     path('refresh-videos/<int:course_id>/', views.refresh_course_videos, name='refresh_videos'),
     path('track-progress/', views.track_video_progress, name='track_progress'),
     path('courses/<int:course_id>/topics/', views.course_topics, name='course_topics'),
+    path('export-progress/', views.export_progress, name='export_progress'),
+    path('youtube-quota/', views.youtube_quota_status, name='youtube_quota_status'),
+    path('analytics/', views.watch_analytics, name='watch_analytics'),
+    path('enrollments/bulk/', views.bulk_enrollment, name='bulk_enrollment'),
 ]
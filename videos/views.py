@@ -1,144 +1,27 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from .models import Course, Topic, UserCourse, Field, VideoProgress
+from django.shortcuts import render, redirect, aget_object_or_404
+from .models import Course, Topic, UserCourse, Field, VideoProgress, WatchEvent, DailyCourseStat, DailyTopicStat
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Prefetch
-import requests
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Prefetch, Sum
+from django.utils import timezone
+from datetime import timedelta
+from AcademiX.db_routers import replica_reads
+from AcademiX.ratelimit import rate_limit
+from AcademiX.sharding import shard_for_user
+from AcademiX.sqlite import run_write
+from .archive import archived_duration
+from .enrollment import bulk_enroll, is_enrolled, queue_topic_ingestion, resolve_users
+from .enrollment_index import enrollment_index
+from .leaderboards import record_activity, top_learners, course_rank
+from .queries import dashboard_summary, topics_with_progress
+from .exports import stream_progress_export, parse_export_date, EXPORT_FORMATS
+from .youtube import acreate_topics_for_courses, arefresh_course_topics
+from .quota import BACKGROUND, QuotaDeferred, scheduler
+from asgiref.sync import sync_to_async
 import json
-import re
-
-from django.conf import settings
-YOUTUBE_API_KEY = getattr(settings, 'YOUTUBE_API_KEY', '')
-
-def parse_duration(duration):
-    """Parse YouTube API duration format (PT4M13S) to readable format (4:13)"""
-    if not duration:
-        return ''
-    
-    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration)
-    if not match:
-        return ''
-    
-    hours, minutes, seconds = match.groups()
-    hours = int(hours or 0)
-    minutes = int(minutes or 0)
-    seconds = int(seconds or 0)
-    
-    if hours > 0:
-        return f"{hours}:{minutes:02d}:{seconds:02d}"
-    else:
-        return f"{minutes}:{seconds:02d}"
-
-def get_video_details(video_ids):
-    """Get additional video details like duration and view count"""
-    if not video_ids:
-        return {}
-    
-    url = 'https://www.googleapis.com/youtube/v3/videos'
-    params = {
-        'part': 'contentDetails,statistics',
-        'id': ','.join(video_ids),
-        'key': YOUTUBE_API_KEY
-    }
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        details = {}
-        
-        for item in data.get('items', []):
-            video_id = item['id']
-            content_details = item.get('contentDetails', {})
-            statistics = item.get('statistics', {})
-            
-            details[video_id] = {
-                'duration': parse_duration(content_details.get('duration', '')),
-                'viewCount': int(statistics.get('viewCount', 0))
-            }
-        
-        return details
-        
-    except Exception as e:
-        print(f"Error fetching video details: {e}")
-        return {}
-
-def fetch_youtube_topics(query, max_results=10):
-    """Enhanced YouTube API function to fetch videos with thumbnails and metadata"""
-    url = 'https://www.googleapis.com/youtube/v3/search'
-    params = {
-        'part': 'snippet',
-        'q': f"{query} tutorial programming course",
-        'type': 'video',
-        'maxResults': max_results,
-        'key': YOUTUBE_API_KEY,
-        'order': 'relevance',
-        'videoDuration': 'medium',
-        'videoDefinition': 'high',
-        'relevanceLanguage': 'en'
-    }
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        items = data.get('items', [])
-        
-        # Get additional video details
-        video_ids = [item['id']['videoId'] for item in items]
-        video_details = get_video_details(video_ids)
-        
-        videos = []
-        for item in items:
-            video_id = item['id']['videoId']
-            snippet = item['snippet']
-            details = video_details.get(video_id, {})
-            
-            videos.append({
-                'name': snippet['title'],
-                'url': f"https://www.youtube.com/embed/{video_id}",
-                'thumbnail': snippet['thumbnails'].get('medium', {}).get('url', ''),
-                'channel': snippet['channelTitle'],
-                'published': snippet['publishedAt'],
-                'description': snippet.get('description', '')[:200],
-                'duration': details.get('duration', ''),
-                'view_count': details.get('viewCount', 0)
-            })
-        
-        return videos
-        
-    except requests.RequestException as e:
-        print(f"Error fetching YouTube videos: {e}")
-        return []
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-        return []
-
-def create_topics_for_course(course, max_results=15):
-    """Helper function to create topics for a course"""
-    if course.topics.exists():
-        return 0  # Topics already exist
-    
-    results = fetch_youtube_topics(course.title, max_results=max_results)
-    topics_created = 0
-    
-    for res in results:
-        try:
-            Topic.objects.create(
-                course=course,
-                name=res["name"],
-                url=res["url"],
-                description=res.get("description", ""),
-                is_recommended=True
-            )
-            topics_created += 1
-        except Exception as e:
-            print(f"Error creating topic: {e}")
-    
-    return topics_created
 
 def get_grouped_courses():
     """Helper function to get courses grouped by field"""
@@ -171,41 +54,57 @@ def get_grouped_courses():
         print(f"Error getting grouped courses: {e}")
         return []
 
+def _course_registration_page(request):
+    """Render the course catalog for registration (sync: ORM + template rendering)"""
+    # Get fields with courses for display, most popular courses first
+    fields = Field.objects.prefetch_related(
+        Prefetch('courses', queryset=Course.objects.order_by('-enrolled_count', 'title'))
+    ).order_by('name')
+    
+    context = {
+        'fields': fields
+    }
+    return render(request, 'course-registration.html', context)
+
 @login_required
-def course_registration(request):
+@replica_reads
+async def course_registration(request):
     """Course registration view with sidebar interface"""
     if request.method == "POST":
+        user = await request.auser()
         selected_ids = request.POST.getlist("course")
                         
         if not selected_ids:
             messages.error(request, "Please select at least one course.")
         else:
-            enrolled_count = 0
-            already_enrolled = []
-            
+            course_ids = [int(course_id) for course_id in selected_ids if course_id.isdigit()]
+            courses = await Course.objects.ain_bulk(course_ids)
             for course_id in selected_ids:
-                try:
-                    course = Course.objects.get(id=course_id)
-                    user_course, created = UserCourse.objects.get_or_create(
-                        user=request.user,
-                        course=course
-                    )
-                                        
-                    if created:
-                        enrolled_count += 1
-                        # Auto-generate topics
-                        topics_created = create_topics_for_course(course)
-                        if topics_created > 0:
-                            messages.success(request, f"Enrolled in {course.title} with {topics_created} videos!")
-                        else:
-                            messages.warning(request, f"Enrolled in {course.title} but no videos found.")
-                    else:
-                        already_enrolled.append(course.title)
-                                    
-                except Course.DoesNotExist:
+                if not course_id.isdigit() or int(course_id) not in courses:
                     messages.error(request, f"Course with ID {course_id} does not exist.")
-                except Exception as e:
-                    messages.error(request, f"Error processing course {course_id}: {str(e)}")
+            
+            # Topics are fetched below while the user waits, so don't queue them
+            result = await sync_to_async(bulk_enroll)(
+                [(user.id, course_id) for course_id in courses], queue_topics=False
+            )
+            created_ids = {course_id for _, course_id in result['created']}
+            new_courses = [course for course_id, course in courses.items() if course_id in created_ids]
+            already_enrolled = [course.title for course_id, course in courses.items() if course_id not in created_ids]
+            
+            # Auto-generate topics, fetching from YouTube for all new courses concurrently;
+            # courses deferred by the quota are queued for `manage.py refresh_topics`
+            topics_created = await acreate_topics_for_courses(new_courses)
+            deferred = [course.id for course in new_courses if topics_created[course.id] is None]
+            if deferred:
+                await sync_to_async(queue_topic_ingestion)(deferred, requested_by=user)
+            for course in new_courses:
+                if topics_created[course.id] is None:
+                    messages.warning(request, f"Enrolled in {course.title}. Videos will be added once YouTube quota is available.")
+                elif topics_created[course.id] > 0:
+                    messages.success(request, f"Enrolled in {course.title} with {topics_created[course.id]} videos!")
+                else:
+                    messages.warning(request, f"Enrolled in {course.title} but no videos found.")
+            enrolled_count = len(new_courses)
                         
             # Summary messages
             if enrolled_count > 0 and enrolled_count < 2:
@@ -220,20 +119,10 @@ def course_registration(request):
                 messages.info(request, f"Already enrolled in: {', '.join(already_enrolled)}")
                 return redirect("course_registration")
                                 
-
-    # Get fields with courses for display
-    fields = Field.objects.prefetch_related('courses').order_by('name')
-    
-    # Add course count to each field
-    for field in fields:
-        field.course_count = field.courses.count()
-    
-    context = {
-        'fields': fields
-    }
-    return render(request, 'course-registration.html', context)
+    return await sync_to_async(_course_registration_page)(request)
 
 @login_required
+@replica_reads
 def my_courses(request):
     """Display user's enrolled courses (simplified version)"""
     # Get all courses the user is enrolled in
@@ -242,27 +131,18 @@ def my_courses(request):
     if not user_courses.exists():
         return render(request, 'courses.html', {'no_courses': True})
     
-    # Prepare course data with topic counts
-    courses_data = []
-    total_topics = 0
-    completed_topics = 0
+    # Topic counts come from the denormalized Course.topic_count
+    courses_data = [user_course.course for user_course in user_courses]
+    total_topics = sum(course.topic_count for course in courses_data)
     
-    for user_course in user_courses:
-        course = user_course.course
-        
-        # Count topics for this course
-        topic_count = Topic.objects.filter(course=course).count()
-        total_topics += topic_count
-        
-        # Count completed topics for this course
-        course_topics = Topic.objects.filter(course=course)
-        for topic in course_topics:
-            if VideoProgress.objects.filter(user=request.user, topic=topic, completed=True).exists():
-                completed_topics += 1
-        
-        # Add topic count to course object
-        course.topic_count = topic_count
-        courses_data.append(course)
+    # Count completed topics in these courses; progress may live on another
+    # shard, so the completed ids are fetched rather than joined
+    completed_ids = list(
+        VideoProgress.objects.for_user(request.user).filter(completed=True).values_list('topic_id', flat=True)
+    )
+    completed_topics = Topic.objects.filter(
+        course_id__in=[course.id for course in courses_data], id__in=completed_ids
+    ).count()
     
     # Calculate progress percentage
     progress_percentage = 0
@@ -279,121 +159,111 @@ def my_courses(request):
     
     return render(request, 'courses.html', context)
 
+def _edit_courses_page(request):
+    """Render the enrollment editor (sync: ORM + template rendering)"""
+    # Get currently enrolled courses
+    enrolled_course_ids = set(
+        UserCourse.objects.filter(user=request.user).values_list('course_id', flat=True)
+    )
+    
+    # Get fields with courses and enrollment status
+    fields = Field.objects.prefetch_related('courses').order_by('name')
+    
+    # Add enrollment status to each course
+    for field in fields:
+        for course in field.courses.all():
+            course.is_enrolled = course.id in enrolled_course_ids
+    
+    context = {
+        'fields': fields,
+        'enrolled_course_ids': enrolled_course_ids,
+    }
+    
+    return render(request, 'edit-courses.html', context)
+
 @login_required
-def edit_courses(request):
+@replica_reads
+async def edit_courses(request):
     """Edit user's course enrollments with sidebar interface"""
     if request.method == 'POST':
         selected_courses = request.POST.getlist('courses')
         selected_courses = set(map(int, selected_courses)) if selected_courses else set()
-        user = request.user
+        user = await request.auser()
         
         # Get current enrolled courses
-        current_courses = set(UserCourse.objects.filter(user=user).values_list('course_id', flat=True))
+        current_courses = {
+            course_id async for course_id in
+            UserCourse.objects.filter(user=user).values_list('course_id', flat=True)
+        }
         
         # Add new courses
         courses_to_add = selected_courses - current_courses
+        added_courses = []
         for course_id in courses_to_add:
             try:
-                course = Course.objects.get(id=course_id)
-                UserCourse.objects.create(user=user, course=course)
-                
-                # Generate topics if needed
-                topics_created = create_topics_for_course(course)
-                if topics_created > 0:
-                    messages.success(request, f"Added {course.title} with {topics_created} videos!")
-                else:
-                    messages.success(request, f"Added {course.title}")
-                    
+                course = await Course.objects.aget(id=course_id)
+                await UserCourse.objects.acreate(user=user, course=course)
+                added_courses.append(course)
             except Course.DoesNotExist:
                 messages.error(request, f"Course with ID {course_id} not found.")
         
+        # Generate topics if needed, concurrently for all added courses,
+        # queueing the ones deferred by the quota
+        topics_created = await acreate_topics_for_courses(added_courses)
+        deferred = [course.id for course in added_courses if topics_created[course.id] is None]
+        if deferred:
+            await sync_to_async(queue_topic_ingestion)(deferred, requested_by=user)
+        for course in added_courses:
+            if topics_created[course.id] is None:
+                messages.warning(request, f"Added {course.title}. Videos will be added once YouTube quota is available.")
+            elif topics_created[course.id] > 0:
+                messages.success(request, f"Added {course.title} with {topics_created[course.id]} videos!")
+            else:
+                messages.success(request, f"Added {course.title}")
+        
         # Remove unchecked courses
         courses_to_remove = current_courses - selected_courses
         if courses_to_remove:
-            removed_courses = Course.objects.filter(id__in=courses_to_remove)
-            course_names = [course.title for course in removed_courses]
-            UserCourse.objects.filter(user=user, course_id__in=courses_to_remove).delete()
+            course_names = [
+                course.title async for course in Course.objects.filter(id__in=courses_to_remove)
+            ]
+            await UserCourse.objects.filter(user=user, course_id__in=courses_to_remove).adelete()
             messages.success(request, f"Removed courses: {', '.join(course_names)}")
         
         return redirect('my_courses')
     
     else:
-        # Get currently enrolled courses
-        enrolled_course_ids = set(
-            UserCourse.objects.filter(user=request.user).values_list('course_id', flat=True)
-        )
-        
-        # Get fields with courses and enrollment status
-        fields = Field.objects.prefetch_related('courses').order_by('name')
-        
-        # Add course count and enrollment status to each field/course
-        for field in fields:
-            field.course_count = field.courses.count()
-            for course in field.courses.all():
-                course.is_enrolled = course.id in enrolled_course_ids
-        
-        context = {
-            'fields': fields,
-            'enrolled_course_ids': enrolled_course_ids,
-        }
-        
-        return render(request, 'edit-courses.html', context)
+        return await sync_to_async(_edit_courses_page)(request)
 
 @login_required
+@replica_reads
 def dashboard(request):
-    user = request.user
-    
-    # Get user's courses
-    user_courses = UserCourse.objects.filter(user=user).select_related('course')
-    course_count = user_courses.count()
-    
-    # Get recently watched videos
-    recent_videos = VideoProgress.objects.filter(user=user).order_by('-watched_date')[:5]
-    
-    # Get recommended videos (not watched yet)
-    watched_topics = VideoProgress.objects.filter(user=user).values_list('topic_id', flat=True)
-    user_course_ids = user_courses.values_list('course_id', flat=True)
-    recommended_videos = Topic.objects.filter(
-        course_id__in=user_course_ids,
-        is_recommended=True
-    ).exclude(id__in=watched_topics)[:5]
-    
-    # Get stats
-    videos_watched = VideoProgress.objects.filter(user=user).count()
-    videos_completed = VideoProgress.objects.filter(user=user, completed=True).count()
-    
-    # Calculate completion percentage
-    if videos_watched > 0:
-        completion_percentage = (videos_completed / videos_watched) * 100
-    else:
-        completion_percentage = 0
-    
-    context = {
-        'course_count': course_count,
-        'recent_videos': recent_videos,
-        'recommended_videos': recommended_videos,
-        'videos_watched': videos_watched,
-        'videos_completed': videos_completed,
-        'completion_percentage': completion_percentage,
-        'user_courses': user_courses,
-    }
+    context = dashboard_summary(request.user)
     
     return render(request, 'dashboard.html', context)
 
 @login_required
-def refresh_course_videos(request, course_id):
+@rate_limit('refresh_videos')
+async def refresh_course_videos(request, course_id):
     """AJAX view to refresh videos for a specific course"""
     if request.method == 'POST':
         try:
-            course = get_object_or_404(Course, id=course_id)
+            course = await aget_object_or_404(Course, id=course_id)
+            user = await request.auser()
             
             # Check if user is enrolled
-            if not UserCourse.objects.filter(user=request.user, course=course).exists():
+            if not await UserCourse.objects.filter(user=user, course=course).aexists():
                 return JsonResponse({'success': False, 'error': 'Not enrolled in this course'})
             
-            # Delete existing topics and fetch new ones
-            course.topics.all().delete()
-            topics_created = create_topics_for_course(course)
+            # Refreshes are background work: don't start one unless the quota
+            # budget allows fetching new topics
+            if not await sync_to_async(scheduler.has_budget)('search', BACKGROUND):
+                return JsonResponse({'success': False, 'error': 'YouTube quota is running low, please try again later'})
+            
+            # Fetch new topics, then replace the existing ones (shared with concurrent refreshes)
+            topics_created = await arefresh_course_topics(course, priority=BACKGROUND)
+            if not topics_created:
+                return JsonResponse({'success': False, 'error': f'No new videos found for {course.title}, kept the current ones'})
             
             return JsonResponse({
                 'success': True, 
@@ -401,12 +271,53 @@ def refresh_course_videos(request, course_id):
                 'video_count': topics_created
             })
             
+        except QuotaDeferred:
+            return JsonResponse({'success': False, 'error': 'YouTube quota is running low, please try again later'})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
     
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
+def _record_progress(user, topic, duration, completed):
+    """Write one progress report: progress row, watch event, streak and course score.
+
+    run_write wraps this in a transaction on default; the shard's writes get
+    their own transaction around the whole report, so a failure anywhere rolls
+    back both. Only a failure while committing default after the shard has
+    committed can still leave them apart.
+    """
+    with transaction.atomic(using=shard_for_user(user)):
+        progress, created = VideoProgress.objects.for_user(user).get_or_create(
+            user=user,
+            topic=topic,
+            defaults={'watch_duration': duration, 'completed': completed}
+        )
+        # A resumed video that was archived continues from its archived duration
+        previous_duration = archived_duration(user.id, topic.id) if created else progress.watch_duration
+        was_completed = False if created else progress.completed
+    
+        if not created:
+            progress.watch_duration = duration
+            progress.completed = completed
+            # Always bump watched_date, so re-watching at the same point still counts as recent
+            progress.save(update_fields=[*progress.get_dirty_fields(), 'watched_date'])
+    
+        # Append to the watch-event log for daily analytics rollups, unless the
+        # report added nothing (repeats, seeks backwards)
+        seconds = max(int(duration) - previous_duration, 0)
+        newly_completed = bool(completed) and not was_completed
+        if seconds or newly_completed:
+            WatchEvent.objects.for_user(user).create(
+                user=user,
+                topic=topic,
+                course_id=topic.course_id,
+                seconds=seconds,
+                completed=newly_completed,
+            )
+        record_activity(user, topic.course_id, int(bool(completed)) - int(was_completed))
+
 @login_required
+@rate_limit('track_progress')
 def track_video_progress(request):
     """Track user's video watching progress"""
     if request.method == 'POST':
@@ -417,16 +328,8 @@ def track_video_progress(request):
         
         try:
             topic = Topic.objects.get(id=topic_id)
-            progress, created = VideoProgress.objects.get_or_create(
-                user=request.user,
-                topic=topic,
-                defaults={'watch_duration': duration, 'completed': completed}
-            )
-            
-            if not created:
-                progress.watch_duration = duration
-                progress.completed = completed
-                progress.save()
+            # Serialized with other progress writes on SQLite (AcademiX.sqlite)
+            run_write(_record_progress, request.user, topic, duration, completed)
                 
             return JsonResponse({'status': 'success'})
         except Topic.DoesNotExist:
@@ -435,12 +338,14 @@ def track_video_progress(request):
     return JsonResponse({'status': 'error', 'message': 'Invalid request'}, status=400)
 
 @login_required
+@replica_reads
 def course_topics(request, course_id):
     """Display all topics for a specific course"""
     try:
         # Get the course and verify user is enrolled
         course = Course.objects.get(id=course_id)
-        user_course = UserCourse.objects.get(user=request.user, course=course)
+        if not is_enrolled(request.user.id, course.id):
+            raise UserCourse.DoesNotExist
         
     except (Course.DoesNotExist, UserCourse.DoesNotExist):
         # Redirect to courses page if course doesn't exist or user not enrolled
@@ -448,27 +353,166 @@ def course_topics(request, course_id):
         return redirect('my_courses')
     
     # Get all topics for this course with user progress
-    topics = Topic.objects.filter(course=course).prefetch_related(
-        Prefetch(
-            'videoprogress_set',
-            queryset=VideoProgress.objects.filter(user=request.user),
-            to_attr='user_progress'
-        )
-    ).order_by('uploaded')
-    
-    # Add progress information to each topic
-    completed_count = 0
-    for topic in topics:
-        topic.progress = None
-        if hasattr(topic, 'user_progress') and topic.user_progress:
-            topic.progress = topic.user_progress[0]
-            if topic.progress.completed:
-                completed_count += 1
+    topics = topics_with_progress(request.user, course)
+    completed_count = sum(1 for topic in topics if topic.progress and topic.progress.completed)
+    my_rank, ranked_learners = course_rank(request.user, course.id)
     
     context = {
         'course': course,
         'topics': topics,
         'completed_count': completed_count,
+        'top_learners': top_learners(course.id, limit=5),
+        'my_rank': my_rank,
+        'ranked_learners': ranked_learners,
+    }
+    
+    return render(request, 'topics.html', context)
+
+@staff_member_required
+def export_progress(request):
+    """Stream VideoProgress joined with topic, course and user as CSV or JSONL"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'status': 'error', 'message': 'Unsupported format'}, status=400)
+
+    try:
+        since = parse_export_date(request.GET.get('since'))
+        until = parse_export_date(request.GET.get('until'), end_of_day=True)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    course_id = request.GET.get('course') or None
+    if course_id is not None:
+        if not course_id.isdigit():
+            return JsonResponse({'status': 'error', 'message': 'course must be a course id'}, status=400)
+        course_id = int(course_id)
+        if not Course.objects.filter(id=course_id).exists():
+            return JsonResponse({'status': 'error', 'message': 'Unknown course'}, status=400)
+
+    compress = request.GET.get('gzip') in ('1', 'true', 'yes')
+    include_archive = request.GET.get('archive') in ('1', 'true', 'yes')
+
+    stream = stream_progress_export(
+        export_format,
+        compress=compress,
+        course_id=course_id,
+        since=since,
+        until=until,
+        include_archive=include_archive,
+    )
+
+    content_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f"progress.{export_format}"
+    if compress:
+        content_type = 'application/gzip'
+        filename += '.gz'
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def parse_days(request, default=30, maximum=365):
+    """The ?days= window as an int between 1 and maximum (ValueError if not a number)"""
+    try:
+        days = int(request.GET.get('days', default))
+    except ValueError:
+        raise ValueError("days must be a whole number")
+    return min(max(days, 1), maximum)
+
+@staff_member_required
+def youtube_quota_status(request):
+    """Staff JSON dashboard of today's YouTube quota burn and recent history"""
+    try:
+        days = parse_days(request)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse(scheduler.status(days=days))
+
+@staff_member_required
+def watch_analytics(request):
+    """Staff JSON analytics of minutes watched, read only from the daily rollups"""
+    try:
+        days = parse_days(request)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    course_id = request.GET.get('course')
+    if course_id and not course_id.isdigit():
+        return JsonResponse({'status': 'error', 'message': 'course must be a course id'}, status=400)
+    start = timezone.localdate() - timedelta(days=days - 1)
+    
+    course_stats = DailyCourseStat.objects.filter(day__gte=start)
+    if course_id:
+        course_stats = course_stats.filter(course_id=course_id)
+    
+    daily = course_stats.values('day').annotate(
+        seconds=Sum('seconds'), events=Sum('events'), completions=Sum('completions')
+    ).order_by('day')
+    courses = course_stats.values('course_id', 'course__title').annotate(
+        seconds=Sum('seconds'), events=Sum('events'), completions=Sum('completions')
+    ).order_by('-seconds')[:50]
+    
+    data = {
+        'days': days,
+        'daily': [
+            {'day': row['day'].isoformat(), 'minutes': round(row['seconds'] / 60, 1),
+             'events': row['events'], 'completions': row['completions']}
+            for row in daily
+        ],
+        'courses': [
+            {'course_id': row['course_id'], 'title': row['course__title'],
+             'minutes': round(row['seconds'] / 60, 1), 'events': row['events'],
+             'completions': row['completions']}
+            for row in courses
+        ],
     }
     
-    return render(request, 'topics.html', context)
\ No newline at end of file
+    if course_id:
+        topics = DailyTopicStat.objects.filter(day__gte=start, course_id=course_id).values('topic_id').annotate(
+            seconds=Sum('seconds'), events=Sum('events'), completions=Sum('completions')
+        ).order_by('-seconds')[:50]
+        data['topics'] = [
+            {'topic_id': row['topic_id'], 'minutes': round(row['seconds'] / 60, 1),
+             'events': row['events'], 'completions': row['completions']}
+            for row in topics
+        ]
+        # Cohort overlap from the enrollment bitmaps, of the courses anyone is enrolled in
+        course_id = int(course_id)
+        titles = dict(Course.objects.filter(enrolled_count__gt=0).values_list('id', 'title'))
+        data['learners'] = enrollment_index.count(course_id)
+        data['also_enrolled'] = [
+            {'course_id': other, 'title': titles[other], 'learners': shared}
+            for other, shared in list(enrollment_index.overlaps(course_id, titles).items())[:10]
+        ]
+    
+    return JsonResponse(data)
+
+@staff_member_required
+def bulk_enrollment(request):
+    """Staff JSON endpoint enrolling a cohort: {"users": [...], "courses": [...]} or {"pairs": [[user, course], ...]}"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    
+    try:
+        data = json.loads(request.body)
+        if 'pairs' in data:
+            raw_pairs = [(str(user), int(course)) for user, course in data['pairs']]
+        else:
+            raw_pairs = [(str(user), int(course)) for user in data.get('users', []) for course in data.get('courses', [])]
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'success': False, 'error': f"Invalid request body: {e}"}, status=400)
+    
+    users = resolve_users({user for user, _ in raw_pairs})
+    result = bulk_enroll(
+        [(users[user], course) for user, course in raw_pairs if user in users],
+        queue_topics=data.get('queue_topics', True),
+        requested_by=request.user,
+    )
+    
+    return JsonResponse({
+        'success': True,
+        'enrolled': len(result['created']),
+        'already_enrolled': result['already_enrolled'],
+        'unknown_users': sorted({user for user, _ in raw_pairs} - users.keys()),
+        'unknown_courses': result['unknown_courses'],
+        'queued_topic_refreshes': result['queued_topic_refreshes'],
+    })
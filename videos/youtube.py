@@ -0,0 +1,392 @@
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .counters import add_topics
+from .models import Topic
+from .quota import INTERACTIVE, QuotaDeferred, scheduler
+
+YOUTUBE_API_KEY = getattr(settings, 'YOUTUBE_API_KEY', '')
+YOUTUBE_API_BASE_URL = getattr(settings, 'YOUTUBE_API_BASE_URL', 'https://www.googleapis.com/youtube/v3')
+YOUTUBE_SEARCH_URL = f"{YOUTUBE_API_BASE_URL}/search"
+YOUTUBE_VIDEOS_URL = f"{YOUTUBE_API_BASE_URL}/videos"
+YOUTUBE_PLAYLIST_ITEMS_URL = f"{YOUTUBE_API_BASE_URL}/playlistItems"
+
+# Largest page the list endpoints return, and most ids per videos.list call
+YOUTUBE_PAGE_SIZE = 50
+
+# Topics are written in bulk inserts of this many as pages arrive
+INGEST_CHUNK_SIZE = 50
+
+# Connection pool for the async client; bounds in-flight YouTube calls per operation
+YOUTUBE_MAX_CONNECTIONS = getattr(settings, 'YOUTUBE_MAX_CONNECTIONS', 200)
+YOUTUBE_TIMEOUT = getattr(settings, 'YOUTUBE_TIMEOUT', 10)
+
+
+def parse_duration(duration):
+    """Parse YouTube API duration format (PT4M13S) to readable format (4:13)"""
+    if not duration:
+        return ''
+
+    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration)
+    if not match:
+        return ''
+
+    hours, minutes, seconds = match.groups()
+    hours = int(hours or 0)
+    minutes = int(minutes or 0)
+    seconds = int(seconds or 0)
+
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    else:
+        return f"{minutes}:{seconds:02d}"
+
+
+def _video_details_params(video_ids):
+    return {
+        'part': 'contentDetails,statistics',
+        'id': ','.join(video_ids),
+        'key': YOUTUBE_API_KEY
+    }
+
+
+def _search_params(query, max_results):
+    return {
+        'part': 'snippet',
+        'q': f"{query} tutorial programming course",
+        'type': 'video',
+        'maxResults': max_results,
+        'key': YOUTUBE_API_KEY,
+        'order': 'relevance',
+        'videoDuration': 'medium',
+        'videoDefinition': 'high',
+        'relevanceLanguage': 'en'
+    }
+
+
+def _parse_video_details(data):
+    details = {}
+
+    for item in data.get('items', []):
+        video_id = item['id']
+        content_details = item.get('contentDetails', {})
+        statistics = item.get('statistics', {})
+
+        details[video_id] = {
+            'duration': parse_duration(content_details.get('duration', '')),
+            'viewCount': int(statistics.get('viewCount', 0))
+        }
+
+    return details
+
+
+def _build_videos(items, video_details):
+    videos = []
+    for item in items:
+        video_id = item['id']['videoId']
+        snippet = item['snippet']
+        details = video_details.get(video_id, {})
+
+        videos.append({
+            'name': snippet['title'],
+            'url': f"https://www.youtube.com/embed/{video_id}",
+            'thumbnail': snippet['thumbnails'].get('medium', {}).get('url', ''),
+            'channel': snippet['channelTitle'],
+            'published': snippet['publishedAt'],
+            'description': snippet.get('description', '')[:200],
+            'duration': details.get('duration', ''),
+            'view_count': details.get('viewCount', 0)
+        })
+    return videos
+
+
+def _check_quota_exceeded(response):
+    """Stop spending quota for the day once YouTube reports it exhausted"""
+    if response.status_code == 403 and 'quotaExceeded' in response.text:
+        scheduler.mark_exhausted()
+
+
+def get_video_details(video_ids, priority=INTERACTIVE):
+    """Get additional video details like duration and view count"""
+    if not video_ids:
+        return {}
+
+    try:
+        scheduler.acquire('videos', priority)
+        response = requests.get(YOUTUBE_VIDEOS_URL, params=_video_details_params(video_ids))
+        _check_quota_exceeded(response)
+        response.raise_for_status()
+        return _parse_video_details(response.json())
+
+    except Exception as e:
+        print(f"Error fetching video details: {e}")
+        return {}
+
+
+def _pages(url, params, endpoint, max_items, priority):
+    """Yield the item lists of successive result pages, following nextPageToken lazily"""
+    remaining = max_items
+    page_token = None
+    while remaining is None or remaining > 0:
+        page_size = YOUTUBE_PAGE_SIZE if remaining is None else min(remaining, YOUTUBE_PAGE_SIZE)
+        page_params = dict(params, maxResults=page_size)
+        if page_token:
+            page_params['pageToken'] = page_token
+
+        scheduler.acquire(endpoint, priority)
+        response = requests.get(url, params=page_params)
+        _check_quota_exceeded(response)
+        response.raise_for_status()
+        data = response.json()
+
+        items = data.get('items', [])[:page_size]
+        if items:
+            yield items
+        if remaining is not None:
+            remaining -= len(items)
+        page_token = data.get('nextPageToken')
+        if not page_token or not items:
+            return
+
+
+def iter_search_items(query, max_results=10, priority=INTERACTIVE):
+    """Search results for a query, page by page (100 quota units per page)"""
+    for items in _pages(YOUTUBE_SEARCH_URL, _search_params(query, max_results), 'search', max_results, priority):
+        yield from items
+
+
+def iter_playlist_items(playlist_id, max_results=None, priority=INTERACTIVE):
+    """Videos of a playlist in playlist order, shaped like search results (1 unit per page)"""
+    params = {'part': 'snippet,contentDetails', 'playlistId': playlist_id, 'key': YOUTUBE_API_KEY}
+    for items in _pages(YOUTUBE_PLAYLIST_ITEMS_URL, params, 'playlistItems', max_results, priority):
+        for item in items:
+            snippet = item.get('snippet', {})
+            if snippet.get('title') in ('Deleted video', 'Private video'):
+                continue
+            snippet.setdefault('thumbnails', {})
+            snippet['channelTitle'] = snippet.get('videoOwnerChannelTitle', snippet.get('channelTitle', ''))
+            yield {'id': {'videoId': item['contentDetails']['videoId']}, 'snippet': snippet}
+
+
+def iter_videos(items, priority=INTERACTIVE):
+    """Turn search/playlist items into video dicts, fetching details 50 ids per call"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == YOUTUBE_PAGE_SIZE:
+            yield from _build_videos(batch, get_video_details([i['id']['videoId'] for i in batch], priority=priority))
+            batch = []
+    if batch:
+        yield from _build_videos(batch, get_video_details([i['id']['videoId'] for i in batch], priority=priority))
+
+
+def ingest_topics(course, videos, chunk_size=INGEST_CHUNK_SIZE):
+    """Insert videos as topics of a course in chunks as they stream in; returns topics created.
+
+    Videos already in the course are skipped. Memory stays bounded by one
+    chunk however long the stream is. Errors stop the stream, keeping what
+    was already inserted; QuotaDeferred is re-raised after that.
+    """
+    topics_created = 0
+    chunk = {}
+
+    def flush():
+        existing = set(Topic.objects.filter(course=course, video_id__in=chunk).values_list('video_id', flat=True))
+        new = [topic for video_id, topic in chunk.items() if video_id not in existing]
+        Topic.objects.bulk_create(new)
+        add_topics(course.id, len(new))
+        chunk.clear()
+        return len(new)
+
+    try:
+        for video in videos:
+            video_id = video['url'].rsplit('/', 1)[-1]
+            chunk[video_id] = Topic(
+                course=course,
+                name=video['name'][:255],
+                url=video['url'],
+                description=video.get('description', ''),
+                video_id=video_id,
+                is_recommended=True,
+            )
+            if len(chunk) >= chunk_size:
+                topics_created += flush()
+    except QuotaDeferred:
+        topics_created += flush()
+        raise
+    except requests.RequestException as e:
+        print(f"Error fetching YouTube videos: {e}")
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+
+    if chunk:
+        topics_created += flush()
+    return topics_created
+
+
+def replace_topics(course, videos):
+    """Swap a course's topics for the fetched videos in one transaction; returns topics created"""
+    with transaction.atomic():
+        course.topics.all().delete()
+        return ingest_topics(course, videos)
+
+
+def fetch_youtube_topics(query, max_results=10, priority=INTERACTIVE):
+    """Enhanced YouTube API function to fetch videos with thumbnails and metadata
+
+    Raises QuotaDeferred if the quota scheduler refuses the search call.
+    """
+    try:
+        return list(iter_videos(iter_search_items(query, max_results, priority), priority=priority))
+
+    except QuotaDeferred:
+        raise
+    except requests.RequestException as e:
+        print(f"Error fetching YouTube videos: {e}")
+        return []
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return []
+
+
+def create_topics_for_course(course, max_results=15, priority=INTERACTIVE):
+    """Helper function to create topics for a course"""
+    if course.topics.exists():
+        return 0  # Topics already exist
+
+    videos = iter_videos(iter_search_items(course.title, max_results, priority), priority=priority)
+    return ingest_topics(course, videos)
+
+
+def import_playlist(course, playlist_id, max_results=None, priority=INTERACTIVE):
+    """Stream a whole playlist into a course's topics; returns topics created"""
+    videos = iter_videos(iter_playlist_items(playlist_id, max_results, priority), priority=priority)
+    return ingest_topics(course, videos)
+
+
+@asynccontextmanager
+async def async_client(client=None):
+    """Use the given httpx.AsyncClient, or one opened and closed around the block.
+
+    Under WSGI every async_to_sync call runs a new event loop, so clients
+    are never kept beyond the operation that opened them.
+    """
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(
+        timeout=YOUTUBE_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=YOUTUBE_MAX_CONNECTIONS,
+            max_keepalive_connections=YOUTUBE_MAX_CONNECTIONS,
+        ),
+    ) as client:
+        yield client
+
+
+async def aget_video_details(video_ids, priority=INTERACTIVE, client=None):
+    """Async version of get_video_details()"""
+    if not video_ids:
+        return {}
+
+    try:
+        await sync_to_async(scheduler.acquire)('videos', priority)
+        async with async_client(client) as client:
+            response = await client.get(YOUTUBE_VIDEOS_URL, params=_video_details_params(video_ids))
+        await sync_to_async(_check_quota_exceeded)(response)
+        response.raise_for_status()
+        return _parse_video_details(response.json())
+
+    except Exception as e:
+        print(f"Error fetching video details: {e}")
+        return {}
+
+
+async def afetch_youtube_topics(query, max_results=10, priority=INTERACTIVE, client=None):
+    """Async version of fetch_youtube_topics(); does not block a thread while waiting"""
+    try:
+        await sync_to_async(scheduler.acquire)('search', priority)
+        async with async_client(client) as client:
+            response = await client.get(YOUTUBE_SEARCH_URL, params=_search_params(query, max_results))
+            await sync_to_async(_check_quota_exceeded)(response)
+            response.raise_for_status()
+
+            items = response.json().get('items', [])
+
+            video_ids = [item['id']['videoId'] for item in items]
+            video_details = await aget_video_details(video_ids, priority=priority, client=client)
+
+        return _build_videos(items, video_details)
+
+    except QuotaDeferred:
+        raise
+    except httpx.HTTPError as e:
+        print(f"Error fetching YouTube videos: {e}")
+        return []
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return []
+
+
+async def acreate_topics_for_course(course, max_results=15, priority=INTERACTIVE, client=None):
+    """Async version of create_topics_for_course(); inserts through ingest_topics() too"""
+    if await course.topics.aexists():
+        return 0  # Topics already exist
+
+    videos = await afetch_youtube_topics(course.title, max_results=max_results, priority=priority, client=client)
+    return await sync_to_async(ingest_topics)(course, videos)
+
+
+async def arefresh_course_topics(course, priority=INTERACTIVE):
+    """Replace a course's topics with freshly fetched ones; returns topics created.
+
+    The current topics are only dropped once new videos have been fetched,
+    so a quota deferral (QuotaDeferred is raised) or an API error (0 is
+    returned) leaves the course as it was. Concurrent refreshes of the same
+    course (from any thread, or any process sharing the cache) don't each
+    fetch: the first one runs and the others wait for it, then report the
+    course's new topic count.
+    """
+    lock_key = f"youtube:refresh:{course.id}"
+    timeout = getattr(settings, 'YOUTUBE_REFRESH_LOCK_SECONDS', 120)
+    if await cache.aadd(lock_key, True, timeout):
+        try:
+            videos = await afetch_youtube_topics(course.title, max_results=15, priority=priority)
+            if not videos:
+                return 0
+            return await sync_to_async(replace_topics)(course, videos)
+        finally:
+            await cache.adelete(lock_key)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and await cache.aget(lock_key):
+        await asyncio.sleep(0.25)
+    return await course.topics.acount()
+
+
+async def acreate_topics_for_courses(courses, max_results=15, priority=INTERACTIVE):
+    """Fetch topics for several courses concurrently.
+
+    Returns {course_id: topics_created}, with None for courses whose ingestion
+    was deferred by the quota scheduler.
+    """
+    async def create(course, client):
+        try:
+            return await acreate_topics_for_course(course, max_results=max_results, priority=priority, client=client)
+        except QuotaDeferred as e:
+            print(f"Deferred topic ingestion for {course.title}: {e}")
+            return None
+
+    # One connection pool shared by all the courses' calls
+    async with async_client() as client:
+        counts = await asyncio.gather(*(create(course, client) for course in courses))
+    return {course.id: count for course, count in zip(courses, counts)}